@@ -3,27 +3,130 @@ import logging
 import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_NAME, Platform
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.const import (
+    CONF_CLIENT_ID,
+    CONF_HOST,
+    CONF_NAME,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_SCAN_INTERVAL,
+    CONF_SSL,
+    CONF_USERNAME,
+    CONF_VERIFY_SSL,
+    EVENT_HOMEASSISTANT_STOP,
+    Platform,
+)
+from homeassistant.core import (
+    Event,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import device_registry as dr, discovery, entity_registry as er
 from homeassistant.helpers.typing import ConfigType
+from homeassistant.util import dt as dt_util
 
 from .const import (
     ATTR_BATTERY_LEVEL,
     ATTR_DISCHARGE_DAYS,
+    BATTERY_LEVEL_CRITICAL,
+    BATTERY_LEVEL_LOW,
+    CONF_BATTERY_QUANTITY,
+    CONF_BATTERY_TYPE,
+    CONF_CHEMISTRY,
+    CONF_COMPRESSION,
+    CONF_CRITICAL_THRESHOLD,
     CONF_DISCHARGE_DAYS,
+    CONF_EXPORT_MODE,
+    CONF_LEAN,
+    CONF_LOW_THRESHOLD,
+    CONF_MQTT_EXPORT,
+    CONF_PER_AREA,
+    CONF_SNAPSHOT_INTERVAL,
+    CONF_SCHEDULE_DAYS,
+    CONF_SCHEDULE_END,
+    CONF_SCHEDULE_IDLE,
+    CONF_SCHEDULE_START,
+    CONF_TARGET_DEVICE,
+    CONF_TEMPERATURE_SENSOR,
+    CONF_TOPIC,
+    DEFAULT_BATTERY_QUANTITY,
+    DEFAULT_CHEMISTRY,
+    DEFAULT_EXPORT_INTERVAL,
+    DEFAULT_LEAN,
+    DEFAULT_MQTT_PORT,
+    DEFAULT_MQTT_TOPIC,
+    DEFAULT_SNAPSHOT_INTERVAL,
     DOMAIN,
+    EXPORT_MODE_SNAPSHOT,
+    EXPORT_MODES,
+    LEAN_SKIPPED_ENTITIES,
     MIN_DISCHARGE_DAYS,
+    SERVICE_GET_BATTERY_DEMAND,
+    SERVICE_GET_HISTORY,
     SERVICE_RESET_BATTERY_LEVEL,
     SERVICE_SET_BATTERY_LEVEL,
     SERVICE_SET_DISCHARGE_DAYS,
 )
+from .discharge import schedule_from_config
+from .history import ReplacementHistory
+from .inventory import BatteryInventory
+from .mqtt_export import FleetExporter
+from .websocket_api import async_register_websocket_api
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = [Platform.SENSOR, Platform.BUTTON]
 
-CONFIG_SCHEMA = vol.Schema({DOMAIN: vol.Schema({})}, extra=vol.ALLOW_EXTRA)
+MQTT_EXPORT_SCHEMA = vol.Schema({
+    vol.Required(CONF_HOST): cv.string,
+    vol.Optional(CONF_PORT, default=DEFAULT_MQTT_PORT): cv.port,
+    vol.Optional(CONF_SSL, default=False): cv.boolean,
+    vol.Optional(CONF_VERIFY_SSL, default=True): cv.boolean,
+    vol.Optional(CONF_USERNAME): cv.string,
+    vol.Optional(CONF_PASSWORD): cv.string,
+    vol.Optional(CONF_CLIENT_ID): cv.string,
+    vol.Optional(CONF_TOPIC, default=DEFAULT_MQTT_TOPIC): cv.string,
+    vol.Optional(CONF_PER_AREA, default=False): cv.boolean,
+    vol.Optional(CONF_EXPORT_MODE, default=EXPORT_MODE_SNAPSHOT): vol.In(EXPORT_MODES),
+    vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_EXPORT_INTERVAL): vol.All(
+        cv.time_period, cv.positive_timedelta
+    ),
+    vol.Optional(CONF_SNAPSHOT_INTERVAL, default=DEFAULT_SNAPSHOT_INTERVAL): vol.All(
+        cv.time_period, cv.positive_timedelta
+    ),
+    vol.Optional(CONF_COMPRESSION, default=False): cv.boolean,
+})
+
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema({
+            vol.Optional(CONF_LEAN, default=DEFAULT_LEAN): cv.boolean,
+            vol.Optional(CONF_MQTT_EXPORT): MQTT_EXPORT_SCHEMA,
+        })
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+
+def is_lean_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Return True if the entry should only create the battery level sensor."""
+    return entry.data.get(CONF_LEAN, DEFAULT_LEAN) or hass.data[DOMAIN].get(CONF_LEAN, DEFAULT_LEAN)
+
+
+def _remove_lean_skipped_entities(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove registry entries of companion entities that lean mode does not create."""
+    entity_registry = er.async_get(hass)
+    for platform, suffix in LEAN_SKIPPED_ENTITIES:
+        entity_id = entity_registry.async_get_entity_id(
+            platform, DOMAIN, f"{DOMAIN}_{entry.entry_id}{suffix}"
+        )
+        if entity_id:
+            entity_registry.async_remove(entity_id)
+            _LOGGER.debug("Removed %s, not used in lean mode", entity_id)
 
 
 def _register_services(hass: HomeAssistant) -> None:
@@ -60,6 +163,33 @@ def _register_services(hass: HomeAssistant) -> None:
                     await entity.async_set_discharge_days(discharge_days)
                     break
 
+    async def get_history(call: ServiceCall) -> ServiceResponse:
+        """Return replacement history and lifetime statistics."""
+        history = hass.data[DOMAIN]["history"]
+        entity_ids = call.data.get("entity_id")
+
+        batteries = {}
+        for entity in hass.data[DOMAIN].get("entities", []):
+            if entity_ids and entity.entity_id not in entity_ids:
+                continue
+            batteries[entity.entity_id] = {
+                "replacements": history.records(entity._entry_id),
+                "stats": history.stats([entity._entry_id]),
+            }
+
+        return {
+            "batteries": batteries,
+            "fleet": history.stats(
+                entity._entry_id
+                for entity in hass.data[DOMAIN].get("entities", [])
+                if entity.entity_id in batteries
+            ),
+        }
+
+    async def get_battery_demand(call: ServiceCall) -> ServiceResponse:
+        """Return installed batteries and upcoming demand per battery type."""
+        return {"battery_types": hass.data[DOMAIN]["inventory"].as_dict()}
+
     hass.services.async_register(
         DOMAIN, SERVICE_RESET_BATTERY_LEVEL, reset_battery_level,
         schema=vol.Schema({
@@ -91,9 +221,53 @@ def _register_services(hass: HomeAssistant) -> None:
         })
     )
 
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_HISTORY,
+        get_history,
+        schema=vol.Schema({
+            vol.Optional("entity_id"): cv.entity_ids,
+        }),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_BATTERY_DEMAND,
+        get_battery_demand,
+        supports_response=SupportsResponse.ONLY,
+    )
+
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the Virtual Battery component."""
+    hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][CONF_LEAN] = config.get(DOMAIN, {}).get(CONF_LEAN, DEFAULT_LEAN)
+
+    history = ReplacementHistory(hass)
+    await history.async_load()
+    hass.data[DOMAIN]["history"] = history
+
+    # Demand sensors are created per battery type, not per config entry
+    inventory = BatteryInventory(hass)
+    hass.data[DOMAIN]["inventory"] = inventory
+    hass.data[DOMAIN]["unsub_rollover"] = inventory.async_start()
+
+    @callback
+    def _async_stop(_event: Event) -> None:
+        """Stop the daily demand rollover."""
+        hass.data[DOMAIN].pop("unsub_rollover")()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop)
+    hass.async_create_task(
+        discovery.async_load_platform(hass, Platform.SENSOR, DOMAIN, {}, config)
+    )
+
+    async_register_websocket_api(hass)
+
+    if CONF_MQTT_EXPORT in config.get(DOMAIN, {}):
+        FleetExporter(hass, config[DOMAIN][CONF_MQTT_EXPORT]).async_start()
+
     return True
 
 
@@ -104,6 +278,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Ensure we have a consistent data structure
     if "entities" not in hass.data[DOMAIN]:
         hass.data[DOMAIN]["entities"] = []
+    if "platforms" not in hass.data[DOMAIN]:
+        hass.data[DOMAIN]["platforms"] = {}
     
     # Register services only once (when first entry is set up)
     if not hass.services.has_service(DOMAIN, SERVICE_RESET_BATTERY_LEVEL):
@@ -111,7 +287,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         
     hass.data[DOMAIN][entry.entry_id] = entry.data
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    # Lean entries only get the battery level sensor
+    if is_lean_entry(hass, entry):
+        platforms = [Platform.SENSOR]
+        _remove_lean_skipped_entities(hass, entry)
+    else:
+        platforms = PLATFORMS
+    hass.data[DOMAIN]["platforms"][entry.entry_id] = platforms
+
+    await hass.config_entries.async_forward_entry_setups(entry, platforms)
 
     # Register update listener for config entry changes
     entry.async_on_unload(entry.add_update_listener(async_update_options))
@@ -121,28 +305,74 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Handle options update."""
     try:
-        # Update data structure with new options
+        # Only apply what changed compared to the data the entry was set up with
+        old_data = hass.data[DOMAIN].get(entry.entry_id, {})
         hass.data[DOMAIN][entry.entry_id] = entry.data
-        
-        # Find and update the entity associated with this entry
-        if "entities" in hass.data[DOMAIN]:
-            for entity in hass.data[DOMAIN]["entities"]:
-                try:
-                    if entity._entry_id == entry.entry_id:
-                        # Update entity with new discharge days
-                        if CONF_DISCHARGE_DAYS in entry.data:
-                            await entity.async_set_discharge_days(entry.data[CONF_DISCHARGE_DAYS])
-                            _LOGGER.debug(
-                                "Updated discharge days for %s to %d from config entry",
-                                entity.entity_id,
-                                entry.data[CONF_DISCHARGE_DAYS],
-                            )
-                except Exception as entity_ex:
-                    _LOGGER.error(
-                        "Failed to update entity %s with new options: %s",
-                        entity.entity_id if hasattr(entity, 'entity_id') else 'unknown',
-                        entity_ex
-                    )
+        changed = {
+            key for key in {*old_data, *entry.data}
+            if old_data.get(key) != entry.data.get(key)
+        }
+        if not changed:
+            return
+
+        # Switching lean mode on or off changes the set of platforms
+        loaded_platforms = hass.data[DOMAIN]["platforms"].get(entry.entry_id)
+        if loaded_platforms is not None and (Platform.BUTTON in loaded_platforms) == is_lean_entry(hass, entry):
+            _LOGGER.debug("Lean mode changed for entry %s, reloading", entry.entry_id)
+            hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+            return
+
+        battery = hass.data[DOMAIN].get("batteries", {}).get(entry.entry_id)
+        if battery is None:
+            return
+
+        if CONF_NAME in changed:
+            name = entry.data[CONF_NAME]
+            await battery.async_set_name(name)
+            button = hass.data[DOMAIN].get("buttons", {}).get(entry.entry_id)
+            if button is not None:
+                button.async_set_name(name)
+            if not entry.data.get(CONF_TARGET_DEVICE):
+                device_registry = dr.async_get(hass)
+                device = device_registry.async_get_device(identifiers={(DOMAIN, entry.entry_id)})
+                if device is not None:
+                    device_registry.async_update_device(device.id, name=name)
+
+        if CONF_TARGET_DEVICE in changed:
+            await battery.async_set_target_device(
+                entry.data[CONF_NAME], entry.data.get(CONF_TARGET_DEVICE)
+            )
+
+        if CONF_DISCHARGE_DAYS in changed:
+            await battery.async_set_discharge_days(entry.data[CONF_DISCHARGE_DAYS])
+            _LOGGER.debug(
+                "Updated discharge days for %s to %d from config entry",
+                battery.entity_id,
+                entry.data[CONF_DISCHARGE_DAYS],
+            )
+
+        if changed & {CONF_BATTERY_TYPE, CONF_BATTERY_QUANTITY}:
+            await battery.async_set_battery_type(
+                entry.data.get(CONF_BATTERY_TYPE),
+                entry.data.get(CONF_BATTERY_QUANTITY, DEFAULT_BATTERY_QUANTITY),
+            )
+
+        if changed & {CONF_LOW_THRESHOLD, CONF_CRITICAL_THRESHOLD}:
+            await battery.async_set_thresholds(
+                entry.data.get(CONF_LOW_THRESHOLD, BATTERY_LEVEL_LOW),
+                entry.data.get(CONF_CRITICAL_THRESHOLD, BATTERY_LEVEL_CRITICAL),
+            )
+
+        if changed & {CONF_TEMPERATURE_SENSOR, CONF_CHEMISTRY}:
+            await battery.async_set_temperature_compensation(
+                entry.data.get(CONF_TEMPERATURE_SENSOR),
+                entry.data.get(CONF_CHEMISTRY, DEFAULT_CHEMISTRY),
+            )
+
+        if changed & {CONF_SCHEDULE_DAYS, CONF_SCHEDULE_START, CONF_SCHEDULE_END, CONF_SCHEDULE_IDLE}:
+            await battery.async_set_schedule(
+                schedule_from_config(entry.data, dt_util.DEFAULT_TIME_ZONE)
+            )
     except Exception as ex:
         _LOGGER.error("Failed to update options for entry %s: %s", entry.entry_id, ex)
         # Re-raise to ensure Home Assistant knows the update failed
@@ -150,9 +380,13 @@ async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    platforms = hass.data[DOMAIN]["platforms"].get(entry.entry_id, PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, platforms)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id, None)
+        hass.data[DOMAIN]["platforms"].pop(entry.entry_id, None)
+        hass.data[DOMAIN].get("batteries", {}).pop(entry.entry_id, None)
+        hass.data[DOMAIN].get("buttons", {}).pop(entry.entry_id, None)
         
         # Remove entities associated with this entry from the entities list
         if "entities" in hass.data[DOMAIN]:
@@ -162,3 +396,9 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             ]
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the replacement history of a deleted config entry."""
+    if "history" in hass.data.get(DOMAIN, {}):
+        hass.data[DOMAIN]["history"].async_remove(entry.entry_id)
@@ -4,7 +4,7 @@ import logging
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers import device_registry as dr
@@ -50,6 +50,9 @@ async def async_setup_entry(
     button = VirtualBatteryResetButton(hass, entry.entry_id, name, device_info)
     async_add_entities([button])
 
+    # Store button instance in hass.data for in-place reconfiguration
+    hass.data[DOMAIN].setdefault("buttons", {})[entry.entry_id] = button
+
 class VirtualBatteryResetButton(ButtonEntity, RestoreEntity):
     """Implementation of a Virtual Battery Reset button."""
 
@@ -71,12 +74,22 @@ class VirtualBatteryResetButton(ButtonEntity, RestoreEntity):
         # but it's good practice to implement for consistency
         await self.async_get_last_state()
 
+    @callback
+    def async_set_name(self, name) -> None:
+        """Rename the button."""
+        self._attr_name = f"{name} Reset"
+        self.async_write_ha_state()
+
+    @callback
+    def async_set_device_info(self, device_info: DeviceInfo) -> None:
+        """Set the device info after the button was moved to another device."""
+        self._attr_device_info = device_info
+
     async def async_press(self) -> None:
         """Handle the button press - reset the battery to 100%."""
-        if DOMAIN in self._hass.data and "entities" in self._hass.data[DOMAIN]:
-            for entity in self._hass.data[DOMAIN]["entities"]:
-                if hasattr(entity, '_entry_id') and entity._entry_id == self._entry_id:
-                    await entity.async_reset_battery()
-                    _LOGGER.debug("Reset button pressed for %s", self._attr_name)
-                    return
-            _LOGGER.warning("Could not find matching sensor entity for button %s", self._attr_name)
+        battery = self._hass.data.get(DOMAIN, {}).get("batteries", {}).get(self._entry_id)
+        if battery is not None:
+            await battery.async_reset_battery()
+            _LOGGER.debug("Reset button pressed for %s", self._attr_name)
+            return
+        _LOGGER.warning("Could not find matching sensor entity for button %s", self._attr_name)
@@ -3,25 +3,169 @@ import logging
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.const import CONF_NAME, STATE_UNAVAILABLE, WEEKDAYS
 from homeassistant.core import callback
-from homeassistant.helpers import config_validation as cv, device_registry as dr
-from homeassistant.helpers.selector import DeviceSelector, DeviceSelectorConfig
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers import (
+    area_registry as ar,
+    config_validation as cv,
+    device_registry as dr,
+    entity_registry as er,
+)
+from homeassistant.helpers.selector import (
+    DeviceSelector,
+    DeviceSelectorConfig,
+    EntitySelector,
+    EntitySelectorConfig,
+    NumberSelector,
+    NumberSelectorConfig,
+    NumberSelectorMode,
+    SelectOptionDict,
+    SelectSelector,
+    SelectSelectorConfig,
+    SelectSelectorMode,
+    TimeSelector,
+)
 
 from .const import (
     DOMAIN,
+    BATTERY_LEVEL_CRITICAL,
+    BATTERY_LEVEL_LOW,
+    BATTERY_TYPES,
+    CONF_BATTERY_QUANTITY,
+    CONF_BATTERY_TYPE,
+    CONF_CHEMISTRY,
+    CONF_CRITICAL_THRESHOLD,
     CONF_DISCHARGE_DAYS,
+    CONF_LEAN,
+    CONF_LOW_THRESHOLD,
+    CONF_SCHEDULE_DAYS,
+    CONF_SCHEDULE_END,
+    CONF_SCHEDULE_IDLE,
+    CONF_SCHEDULE_START,
     CONF_TARGET_DEVICE,
+    CONF_TARGET_DEVICES,
+    CONF_TEMPERATURE_SENSOR,
+    DEFAULT_BATTERY_QUANTITY,
+    DEFAULT_CHEMISTRY,
     DEFAULT_DISCHARGE_DAYS,
-    MIN_DISCHARGE_DAYS
+    DEFAULT_LEAN,
+    DEFAULT_SCHEDULE_END,
+    DEFAULT_SCHEDULE_IDLE,
+    DEFAULT_SCHEDULE_START,
+    MIN_DISCHARGE_DAYS,
+    SOURCE_BATCH,
+    SUGGESTED_DEVICE_DOMAINS,
+    TEMPERATURE_CURVES,
 )
+from .inventory import normalize_battery_type
 
 _LOGGER = logging.getLogger(__name__)
 
+TEMPERATURE_SENSOR_SELECTOR = EntitySelector(
+    EntitySelectorConfig(domain="sensor", device_class="temperature")
+)
+SCHEDULE_DAYS_SELECTOR = SelectSelector(
+    SelectSelectorConfig(
+        options=WEEKDAYS,
+        multiple=True,
+        mode=SelectSelectorMode.LIST,
+        translation_key=CONF_SCHEDULE_DAYS,
+    )
+)
+SCHEDULE_IDLE_SELECTOR = NumberSelector(
+    NumberSelectorConfig(
+        min=0, max=100, step=1, unit_of_measurement="%", mode=NumberSelectorMode.BOX
+    )
+)
+BATTERY_TYPE_SELECTOR = SelectSelector(
+    SelectSelectorConfig(
+        options=BATTERY_TYPES,
+        custom_value=True,
+        mode=SelectSelectorMode.DROPDOWN,
+    )
+)
+BATTERY_QUANTITY_SCHEMA = vol.All(vol.Coerce(int), vol.Range(min=1))
+THRESHOLD_SCHEMA = vol.All(vol.Coerce(int), vol.Range(min=0, max=100))
+CHEMISTRY_SELECTOR = SelectSelector(
+    SelectSelectorConfig(
+        options=list(TEMPERATURE_CURVES),
+        mode=SelectSelectorMode.DROPDOWN,
+        translation_key=CONF_CHEMISTRY,
+    )
+)
+
+
+def _device_suggestions(hass) -> list[SelectOptionDict]:
+    """Index the registries once and rank the devices that could use a virtual battery.
+
+    Devices with a reporting battery sensor or a virtual battery are left out.
+    Devices whose battery sensors are all disabled or unavailable come first,
+    then devices with entities in SUGGESTED_DEVICE_DOMAINS, then devices with
+    an area, each sorted by name.
+    """
+    entity_registry = er.async_get(hass)
+    device_registry = dr.async_get(hass)
+    area_registry = ar.async_get(hass)
+
+    excluded = {
+        entry.data.get(CONF_TARGET_DEVICE)
+        for entry in hass.config_entries.async_entries(DOMAIN)
+    }
+    unreported = set()
+    battery_powered = set()
+    for entity in entity_registry.entities.values():
+        if entity.device_id is None:
+            continue
+        if entity.platform == DOMAIN:
+            excluded.add(entity.device_id)
+        # Battery level sensors and low battery binary sensors both report a battery
+        elif (
+            entity.domain in ("sensor", "binary_sensor")
+            and (entity.device_class or entity.original_device_class) == "battery"
+        ):
+            state = hass.states.get(entity.entity_id)
+            if entity.disabled or state is None or state.state == STATE_UNAVAILABLE:
+                unreported.add(entity.device_id)
+            else:
+                excluded.add(entity.device_id)
+        elif entity.domain in SUGGESTED_DEVICE_DOMAINS:
+            battery_powered.add(entity.device_id)
+
+    ranked = []
+    for device in device_registry.devices.values():
+        name = device.name_by_user or device.name
+        if (
+            not name
+            or device.id in excluded
+            or device.disabled
+            or device.entry_type is dr.DeviceEntryType.SERVICE
+        ):
+            continue
+        area = area_registry.async_get_area(device.area_id) if device.area_id else None
+        label = f"{name} ({area.name})" if area else name
+        ranked.append((
+            device.id not in unreported,
+            device.id not in battery_powered,
+            area is None,
+            label.casefold(),
+            device.id,
+            label,
+        ))
+
+    ranked.sort()
+    return [SelectOptionDict(value=device_id, label=label) for *_, device_id, label in ranked]
+
+
 class VirtualBatteryConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Virtual Battery."""
 
     VERSION = 1
 
+    def __init__(self):
+        """Initialize the config flow."""
+        self._suggestions: list[SelectOptionDict] | None = None
+
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
         errors = {}
@@ -32,27 +176,52 @@ class VirtualBatteryConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 if not user_input[CONF_DISCHARGE_DAYS] >= MIN_DISCHARGE_DAYS:
                     errors[CONF_DISCHARGE_DAYS] = "discharge_days_invalid"
                 else:
-                    # Validate target device exists if specified
-                    target_device = user_input.get(CONF_TARGET_DEVICE)
-                    if target_device:
-                        device_registry = dr.async_get(self.hass)
-                        device = device_registry.async_get(target_device)
-                        if device is None:
-                            errors[CONF_TARGET_DEVICE] = "device_not_found"
-                    
-                    if not errors:
+                    # One battery per selected device, or a standalone battery
+                    batteries = self._batteries_from_input(user_input)
+                    if batteries is None:
+                        errors[CONF_TARGET_DEVICES] = "device_not_found"
+                    else:
                         # Check for duplicate names
-                        await self.async_set_unique_id(user_input["name"])
-                        self._abort_if_unique_id_configured()
+                        names = [data[CONF_NAME] for data in batteries]
+                        existing = {
+                            entry.unique_id
+                            for entry in self.hass.config_entries.async_entries(DOMAIN)
+                        }
+                        if len(set(names)) != len(names) or existing.intersection(names):
+                            errors[CONF_NAME] = "name_exists"
 
-                        return self.async_create_entry(
-                            title=user_input["name"],
-                            data=user_input,
-                        )
+                    if not errors:
+                        # A flow creates one entry, the other batteries get a flow each
+                        failed = await self._async_create_batch(batteries[1:])
+                        data = batteries[0]
+                        await self.async_set_unique_id(data[CONF_NAME])
+                        self._abort_if_unique_id_configured()
+                        if failed:
+                            return self.async_create_entry(
+                                title=data[CONF_NAME],
+                                data=data,
+                                description="batch_failed",
+                                description_placeholders={"failed": ", ".join(failed)},
+                            )
+                        return self.async_create_entry(title=data[CONF_NAME], data=data)
             except Exception as ex:  # pylint: disable=broad-except
                 _LOGGER.error("Unexpected exception: %s", ex)
                 errors["base"] = "unknown"
 
+        # Walking the registries is done once per flow, not on every form
+        if self._suggestions is None:
+            self._suggestions = _device_suggestions(self.hass)
+
+        target_devices = {}
+        if self._suggestions:
+            target_devices[vol.Optional(CONF_TARGET_DEVICES, default=[])] = SelectSelector(
+                SelectSelectorConfig(
+                    options=self._suggestions,
+                    multiple=True,
+                    mode=SelectSelectorMode.DROPDOWN,
+                )
+            )
+
         return self.async_show_form(
             step_id="user",
             data_schema=vol.Schema({
@@ -61,13 +230,78 @@ class VirtualBatteryConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     vol.Coerce(int),
                     vol.Range(min=MIN_DISCHARGE_DAYS)
                 ),
-                vol.Optional(CONF_TARGET_DEVICE): DeviceSelector(
-                    DeviceSelectorConfig()
-                ),
+                **target_devices,
+                vol.Optional(CONF_BATTERY_TYPE): BATTERY_TYPE_SELECTOR,
+                vol.Optional(
+                    CONF_BATTERY_QUANTITY, default=DEFAULT_BATTERY_QUANTITY
+                ): BATTERY_QUANTITY_SCHEMA,
+                vol.Optional(CONF_LEAN, default=DEFAULT_LEAN): bool,
+                vol.Optional(CONF_TEMPERATURE_SENSOR): TEMPERATURE_SENSOR_SELECTOR,
+                vol.Optional(CONF_CHEMISTRY, default=DEFAULT_CHEMISTRY): CHEMISTRY_SELECTOR,
+                vol.Optional(CONF_SCHEDULE_DAYS, default=[]): SCHEDULE_DAYS_SELECTOR,
+                vol.Optional(CONF_SCHEDULE_START, default=DEFAULT_SCHEDULE_START): TimeSelector(),
+                vol.Optional(CONF_SCHEDULE_END, default=DEFAULT_SCHEDULE_END): TimeSelector(),
+                vol.Optional(CONF_SCHEDULE_IDLE, default=DEFAULT_SCHEDULE_IDLE): SCHEDULE_IDLE_SELECTOR,
             }),
             errors=errors,
         )
 
+    async def async_step_batch(self, batch_data):
+        """Create a virtual battery for one of the devices selected in the user step."""
+        await self.async_set_unique_id(batch_data[CONF_NAME])
+        self._abort_if_unique_id_configured()
+
+        return self.async_create_entry(
+            title=batch_data[CONF_NAME],
+            data=batch_data,
+        )
+
+    async def _async_create_batch(self, batteries) -> list[str]:
+        """Create the given batteries in flows of their own, return the names that failed."""
+        failed = []
+        for data in batteries:
+            try:
+                result = await self.hass.config_entries.flow.async_init(
+                    DOMAIN, context={"source": SOURCE_BATCH}, data=data
+                )
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error creating virtual battery %s", data[CONF_NAME])
+                failed.append(data[CONF_NAME])
+                continue
+            if result["type"] != FlowResultType.CREATE_ENTRY:
+                _LOGGER.warning(
+                    "Virtual battery %s was not created: %s",
+                    data[CONF_NAME], result.get("reason"),
+                )
+                failed.append(data[CONF_NAME])
+        return failed
+
+    def _batteries_from_input(self, user_input) -> list[dict] | None:
+        """Return the config entry data per battery, None if a device is gone.
+
+        With several devices the device name is prepended to the battery name.
+        """
+        data = {
+            key: value for key, value in user_input.items() if key != CONF_TARGET_DEVICES
+        }
+        if CONF_BATTERY_TYPE in data:
+            data[CONF_BATTERY_TYPE] = normalize_battery_type(data[CONF_BATTERY_TYPE])
+        device_ids = user_input.get(CONF_TARGET_DEVICES) or []
+        if not device_ids:
+            return [data]
+
+        device_registry = dr.async_get(self.hass)
+        batteries = []
+        for device_id in device_ids:
+            device = device_registry.async_get(device_id)
+            if device is None:
+                return None
+            name = data[CONF_NAME]
+            if len(device_ids) > 1:
+                name = f"{device.name_by_user or device.name} {name}"
+            batteries.append({**data, CONF_NAME: name, CONF_TARGET_DEVICE: device_id})
+        return batteries
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
@@ -85,25 +319,116 @@ class VirtualBatteryOptionsFlow(config_entries.OptionsFlow):
             try:
                 if not user_input[CONF_DISCHARGE_DAYS] >= MIN_DISCHARGE_DAYS:
                     errors[CONF_DISCHARGE_DAYS] = "discharge_days_invalid"
+                elif not user_input[CONF_CRITICAL_THRESHOLD] < user_input[CONF_LOW_THRESHOLD]:
+                    errors[CONF_CRITICAL_THRESHOLD] = "thresholds_invalid"
                 else:
-                    # Update data in config entry
-                    data = {**self.config_entry.data, CONF_DISCHARGE_DAYS: user_input[CONF_DISCHARGE_DAYS]}
-                    self.hass.config_entries.async_update_entry(self.config_entry, data=data)
+                    target_device = user_input.get(CONF_TARGET_DEVICE)
+                    if target_device:
+                        device_registry = dr.async_get(self.hass)
+                        if device_registry.async_get(target_device) is None:
+                            errors[CONF_TARGET_DEVICE] = "device_not_found"
+
+                    # The name is the unique ID, so it must stay unique
+                    name = user_input[CONF_NAME]
+                    for entry in self.hass.config_entries.async_entries(DOMAIN):
+                        if entry.entry_id != self.config_entry.entry_id and entry.unique_id == name:
+                            errors[CONF_NAME] = "name_exists"
+
+                if not errors:
+                    # Update data in config entry, the update listener applies
+                    # the changes to the running entities without a reload
+                    data = {
+                        **self.config_entry.data,
+                        CONF_NAME: user_input[CONF_NAME],
+                        CONF_DISCHARGE_DAYS: user_input[CONF_DISCHARGE_DAYS],
+                        CONF_LOW_THRESHOLD: user_input[CONF_LOW_THRESHOLD],
+                        CONF_CRITICAL_THRESHOLD: user_input[CONF_CRITICAL_THRESHOLD],
+                        CONF_TARGET_DEVICE: user_input.get(CONF_TARGET_DEVICE),
+                        CONF_BATTERY_TYPE: normalize_battery_type(user_input.get(CONF_BATTERY_TYPE)),
+                        CONF_BATTERY_QUANTITY: user_input.get(
+                            CONF_BATTERY_QUANTITY, DEFAULT_BATTERY_QUANTITY
+                        ),
+                        CONF_LEAN: user_input.get(CONF_LEAN, DEFAULT_LEAN),
+                        CONF_TEMPERATURE_SENSOR: user_input.get(CONF_TEMPERATURE_SENSOR),
+                        CONF_CHEMISTRY: user_input.get(CONF_CHEMISTRY, DEFAULT_CHEMISTRY),
+                        CONF_SCHEDULE_DAYS: user_input.get(CONF_SCHEDULE_DAYS, []),
+                        CONF_SCHEDULE_START: user_input.get(CONF_SCHEDULE_START, DEFAULT_SCHEDULE_START),
+                        CONF_SCHEDULE_END: user_input.get(CONF_SCHEDULE_END, DEFAULT_SCHEDULE_END),
+                        CONF_SCHEDULE_IDLE: user_input.get(CONF_SCHEDULE_IDLE, DEFAULT_SCHEDULE_IDLE),
+                    }
+                    self.hass.config_entries.async_update_entry(
+                        self.config_entry,
+                        title=user_input[CONF_NAME],
+                        unique_id=user_input[CONF_NAME],
+                        data=data,
+                    )
                     return self.async_create_entry(title="", data=user_input)
             except Exception as ex:  # pylint: disable=broad-except
                 _LOGGER.error("Unexpected exception: %s", ex)
                 errors["base"] = "unknown"
 
+        data = self.config_entry.data
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema({
+                vol.Required(CONF_NAME, default=data[CONF_NAME]): str,
                 vol.Required(
                     CONF_DISCHARGE_DAYS,
-                    default=self.config_entry.data.get(CONF_DISCHARGE_DAYS, DEFAULT_DISCHARGE_DAYS)
+                    default=data.get(CONF_DISCHARGE_DAYS, DEFAULT_DISCHARGE_DAYS)
                 ): vol.All(
                     vol.Coerce(int),
                     vol.Range(min=MIN_DISCHARGE_DAYS)
                 ),
+                vol.Required(
+                    CONF_LOW_THRESHOLD,
+                    default=data.get(CONF_LOW_THRESHOLD, BATTERY_LEVEL_LOW)
+                ): THRESHOLD_SCHEMA,
+                vol.Required(
+                    CONF_CRITICAL_THRESHOLD,
+                    default=data.get(CONF_CRITICAL_THRESHOLD, BATTERY_LEVEL_CRITICAL)
+                ): THRESHOLD_SCHEMA,
+                vol.Optional(
+                    CONF_TARGET_DEVICE,
+                    description={"suggested_value": data.get(CONF_TARGET_DEVICE)},
+                ): DeviceSelector(
+                    DeviceSelectorConfig()
+                ),
+                vol.Optional(
+                    CONF_BATTERY_TYPE,
+                    description={"suggested_value": data.get(CONF_BATTERY_TYPE)},
+                ): BATTERY_TYPE_SELECTOR,
+                vol.Optional(
+                    CONF_BATTERY_QUANTITY,
+                    default=data.get(CONF_BATTERY_QUANTITY, DEFAULT_BATTERY_QUANTITY)
+                ): BATTERY_QUANTITY_SCHEMA,
+                vol.Optional(
+                    CONF_LEAN,
+                    default=data.get(CONF_LEAN, DEFAULT_LEAN)
+                ): bool,
+                vol.Optional(
+                    CONF_TEMPERATURE_SENSOR,
+                    description={"suggested_value": data.get(CONF_TEMPERATURE_SENSOR)},
+                ): TEMPERATURE_SENSOR_SELECTOR,
+                vol.Optional(
+                    CONF_CHEMISTRY,
+                    default=data.get(CONF_CHEMISTRY, DEFAULT_CHEMISTRY)
+                ): CHEMISTRY_SELECTOR,
+                vol.Optional(
+                    CONF_SCHEDULE_DAYS,
+                    default=data.get(CONF_SCHEDULE_DAYS, [])
+                ): SCHEDULE_DAYS_SELECTOR,
+                vol.Optional(
+                    CONF_SCHEDULE_START,
+                    default=data.get(CONF_SCHEDULE_START, DEFAULT_SCHEDULE_START)
+                ): TimeSelector(),
+                vol.Optional(
+                    CONF_SCHEDULE_END,
+                    default=data.get(CONF_SCHEDULE_END, DEFAULT_SCHEDULE_END)
+                ): TimeSelector(),
+                vol.Optional(
+                    CONF_SCHEDULE_IDLE,
+                    default=data.get(CONF_SCHEDULE_IDLE, DEFAULT_SCHEDULE_IDLE)
+                ): SCHEDULE_IDLE_SELECTOR,
             }),
             errors=errors,
-        )
\ No newline at end of file
+        )
@@ -4,12 +4,73 @@ from homeassistant.const import CONF_NAME
 
 DOMAIN = "virtual_battery"
 
+# Config flow source of the extra batteries when several devices are selected
+SOURCE_BATCH = "batch"
+
 # Configuration
 CONF_DISCHARGE_DAYS = "discharge_days"
 CONF_TARGET_DEVICE = "target_device"
+CONF_TARGET_DEVICES = "target_devices"
+CONF_LEAN = "lean"
+CONF_TEMPERATURE_SENSOR = "temperature_sensor"
+CONF_CHEMISTRY = "chemistry"
+CONF_LOW_THRESHOLD = "low_threshold"
+CONF_CRITICAL_THRESHOLD = "critical_threshold"
+CONF_SCHEDULE_DAYS = "schedule_days"
+CONF_SCHEDULE_START = "schedule_start"
+CONF_SCHEDULE_END = "schedule_end"
+CONF_SCHEDULE_IDLE = "schedule_idle"
+CONF_BATTERY_TYPE = "battery_type"
+CONF_BATTERY_QUANTITY = "battery_quantity"
 DEFAULT_DISCHARGE_DAYS = 30
 MIN_DISCHARGE_DAYS = 1
 DEFAULT_NAME = "Virtual Battery"
+DEFAULT_LEAN = False
+
+# Battery chemistries for temperature compensation
+CHEMISTRY_ALKALINE = "alkaline"
+CHEMISTRY_LITHIUM = "lithium"
+CHEMISTRY_NIMH = "nimh"
+DEFAULT_CHEMISTRY = CHEMISTRY_ALKALINE
+
+# Discharge rate multiplier by temperature (°C), relative to the configured
+# discharge period at room temperature. Values outside the curve are clamped.
+TEMPERATURE_CURVES = {
+    CHEMISTRY_ALKALINE: (
+        (-20, 4.0), (-10, 2.5), (0, 1.6), (10, 1.2), (20, 1.0),
+        (30, 1.0), (40, 1.1), (50, 1.3), (60, 1.6),
+    ),
+    CHEMISTRY_LITHIUM: (
+        (-40, 2.0), (-20, 1.4), (0, 1.1), (20, 1.0), (40, 1.05), (60, 1.2),
+    ),
+    CHEMISTRY_NIMH: (
+        (-20, 3.0), (0, 1.4), (20, 1.0), (30, 1.1), (40, 1.3), (60, 2.0),
+    ),
+}
+
+# Battery inventory
+DEFAULT_BATTERY_QUANTITY = 1
+BATTERY_TYPES = ["AA", "AAA", "C", "D", "9V", "CR2032", "CR2025", "CR2450", "CR123A", "CR2"]
+DEMAND_HORIZONS = (30, 90, 365)  # Days
+
+# Consumption schedule, percentage of the active consumption outside the schedule
+DEFAULT_SCHEDULE_START = "00:00:00"
+DEFAULT_SCHEDULE_END = "00:00:00"
+DEFAULT_SCHEDULE_IDLE = 0
+
+# Time constant of the temperature average used for the empty forecast
+TEMPERATURE_AVERAGE_WINDOW = timedelta(hours=24)
+
+# Unique ID suffixes of the entities that are skipped in lean mode
+LEAN_SKIPPED_ENTITIES = (
+    ("sensor", "_time_since_reset"),
+    ("sensor", "_time_until_empty"),
+    ("button", "_reset"),
+)
+
+# Entity domains of devices that are often battery powered, like remotes, locks,
+# radiator valves and blinds, ranked after devices with an unreported battery
+SUGGESTED_DEVICE_DOMAINS = {"climate", "cover", "event", "lock"}
 
 # Attributes
 ATTR_DISCHARGE_DAYS = "discharge_days"
@@ -18,11 +79,28 @@ ATTR_LAST_UPDATE = "last_update"
 ATTR_BATTERY_LEVEL = "battery_level"
 ATTR_TIME_SINCE_RESET = "time_since_reset"
 ATTR_TIME_UNTIL_EMPTY = "time_until_empty"
+ATTR_TEMPERATURE_SENSOR = "temperature_sensor"
+ATTR_CHEMISTRY = "chemistry"
+ATTR_TEMPERATURE = "temperature"
+ATTR_AVERAGE_TEMPERATURE = "average_temperature"
+ATTR_CONSUMED = "consumed"
+ATTR_TEMPERATURE_SAMPLED_AT = "temperature_sampled_at"
+ATTR_BATTERY_TYPE = "battery_type"
+ATTR_BATTERY_QUANTITY = "battery_quantity"
+ATTR_INSTALLED = "installed"
 
 # Services
 SERVICE_RESET_BATTERY_LEVEL = "reset_battery_level"
 SERVICE_SET_BATTERY_LEVEL = "set_battery_level"
 SERVICE_SET_DISCHARGE_DAYS = "set_discharge_days"
+SERVICE_GET_HISTORY = "get_history"
+SERVICE_GET_BATTERY_DEMAND = "get_battery_demand"
+
+# Replacement history
+HISTORY_STORAGE_KEY = f"{DOMAIN}.history"
+HISTORY_STORAGE_VERSION = 1
+HISTORY_SIZE = 50  # Replacements kept per battery
+HISTORY_SAVE_DELAY = 10  # Seconds
 
 # Battery Level Thresholds
 BATTERY_LEVEL_LOW = 20
@@ -35,5 +113,36 @@ EVENT_BATTERY_LEVEL_LOW = "virtual_battery_low"
 EVENT_BATTERY_LEVEL_CRITICAL = "virtual_battery_critical"
 EVENT_BATTERY_LEVEL_FULL = "virtual_battery_full"
 
+# Dispatcher signals
+SIGNAL_FLEET_UPDATED = f"{DOMAIN}_fleet_updated"
+SIGNAL_FLEET_REMOVED = f"{DOMAIN}_fleet_removed"
+
+# Websocket API
+WS_TYPE_FLEET = f"{DOMAIN}/fleet"
+WS_TYPE_FLEET_SUBSCRIBE = f"{DOMAIN}/fleet/subscribe"
+FLEET_COLUMNS = ("entity_id", "level", "empty_at", "low", "critical")
+
+# MQTT export
+CONF_MQTT_EXPORT = "mqtt_export"
+CONF_TOPIC = "topic"
+CONF_PER_AREA = "per_area"
+CONF_EXPORT_MODE = "mode"
+CONF_COMPRESSION = "compression"
+CONF_SNAPSHOT_INTERVAL = "snapshot_interval"
+EXPORT_MODE_SNAPSHOT = "snapshot"
+EXPORT_MODE_CHANGES = "changes"
+EXPORT_MODES = [EXPORT_MODE_SNAPSHOT, EXPORT_MODE_CHANGES]
+DEFAULT_MQTT_PORT = 1883
+DEFAULT_MQTT_TOPIC = f"{DOMAIN}/fleet"
+DEFAULT_MQTT_CLIENT_ID = f"{DOMAIN}_exporter"
+MQTT_NO_AREA = "no_area"  # Topic suffix for batteries without an area
+MQTT_CONNECT_TIMEOUT = 10  # Seconds
+MQTT_KEEPALIVE_MARGIN = 30  # Seconds added to the export interval
+MQTT_BACKOFF_MIN = 1  # Seconds
+MQTT_BACKOFF_MAX = 300  # Seconds
+
 # Misc
 SCAN_INTERVAL = timedelta(minutes=1)
+FLEET_BATCH_DELAY = timedelta(seconds=1)
+DEFAULT_EXPORT_INTERVAL = timedelta(minutes=1)
+DEFAULT_SNAPSHOT_INTERVAL = timedelta(hours=1)
@@ -0,0 +1,68 @@
+"""Provides device actions for the Virtual Battery integration."""
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.const import (
+    CONF_DEVICE_ID,
+    CONF_DOMAIN,
+    CONF_ENTITY_ID,
+    CONF_TYPE,
+)
+from homeassistant.core import Context, HomeAssistant
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+from homeassistant.helpers.typing import ConfigType, TemplateVarsType
+
+from .const import DOMAIN, SERVICE_RESET_BATTERY_LEVEL
+
+ACTION_TYPES = {SERVICE_RESET_BATTERY_LEVEL}
+
+ACTION_SCHEMA = cv.DEVICE_ACTION_BASE_SCHEMA.extend(
+    {
+        vol.Required(CONF_TYPE): vol.In(ACTION_TYPES),
+        vol.Required(CONF_ENTITY_ID): cv.entity_id_or_uuid,
+    }
+)
+
+
+async def async_get_actions(hass: HomeAssistant, device_id: str) -> list[dict[str, str]]:
+    """List device actions for the virtual batteries on a device."""
+    entity_registry = er.async_get(hass)
+    actions = []
+
+    for entity_entry in er.async_entries_for_device(entity_registry, device_id):
+        # Only the battery level sensor, not the companion sensors
+        if (
+            entity_entry.platform != DOMAIN
+            or entity_entry.unique_id != f"{DOMAIN}_{entity_entry.config_entry_id}"
+        ):
+            continue
+
+        actions.append(
+            {
+                CONF_DEVICE_ID: device_id,
+                CONF_DOMAIN: DOMAIN,
+                CONF_ENTITY_ID: entity_entry.id,
+                CONF_TYPE: SERVICE_RESET_BATTERY_LEVEL,
+            }
+        )
+
+    return actions
+
+
+async def async_call_action_from_config(
+    hass: HomeAssistant,
+    config: ConfigType,
+    variables: TemplateVarsType,
+    context: Context | None,
+) -> None:
+    """Execute a device action."""
+    entity_id = er.async_resolve_entity_id(er.async_get(hass), config[CONF_ENTITY_ID])
+
+    await hass.services.async_call(
+        DOMAIN,
+        config[CONF_TYPE],
+        {CONF_ENTITY_ID: entity_id},
+        blocking=True,
+        context=context,
+    )
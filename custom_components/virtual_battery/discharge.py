@@ -0,0 +1,236 @@
+"""Discharge model helpers for the Virtual Battery integration."""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+
+from homeassistant.const import WEEKDAYS
+
+from .const import (
+    CONF_SCHEDULE_DAYS,
+    CONF_SCHEDULE_END,
+    CONF_SCHEDULE_IDLE,
+    CONF_SCHEDULE_START,
+    DEFAULT_SCHEDULE_END,
+    DEFAULT_SCHEDULE_IDLE,
+    DEFAULT_SCHEDULE_START,
+)
+
+SECONDS_PER_DAY = 24 * 60 * 60
+WEEK_SECONDS = 7 * SECONDS_PER_DAY
+
+# A Monday, weeks of the schedule are counted from here in local time
+_EPOCH_MONDAY = date(1970, 1, 5)
+
+
+class MultiplierCurve:
+    """Piecewise linear rate multiplier curve, e.g. over temperature."""
+
+    __slots__ = ("_xs", "_ys")
+
+    def __init__(self, points):
+        """Initialize the curve from ((x, multiplier), ...) points."""
+        points = sorted(points)
+        self._xs = [x for x, _ in points]
+        self._ys = [y for _, y in points]
+
+    def __call__(self, x: float) -> float:
+        """Return the multiplier at x, clamped to the curve's end points."""
+        index = bisect_right(self._xs, x)
+        if index == 0:
+            return self._ys[0]
+        if index == len(self._xs):
+            return self._ys[-1]
+
+        x0, x1 = self._xs[index - 1], self._xs[index]
+        y0, y1 = self._ys[index - 1], self._ys[index]
+        return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+
+class WeeklySchedule:
+    """Weekly consumption schedule compiled into a cumulative-consumption table.
+
+    Consumption is measured in effective seconds: the weights are normalized so
+    that one week of the schedule discharges as much as one week of constant
+    discharge. The table holds one row per segment of the week, so looking up
+    the consumption at a point in time is week arithmetic plus a bisect.
+
+    The table is indexed by local wall-clock time, but consumption accrues in
+    real time. A DST transition makes the wall clock jump, so the consumption
+    of the skipped hour (spring) is not charged and the repeated hour (autumn)
+    is charged twice. The transition of each week is looked up once and cached,
+    assuming at most one transition per week.
+    """
+
+    __slots__ = ("_starts", "_cumulative", "_rates", "_time_zone", "_weeks", "_jump_totals")
+
+    def __init__(self, segments, time_zone: tzinfo):
+        """Initialize from (start, end, weight) segments in seconds since Monday 00:00.
+
+        Time not covered by any segment has a weight of 0. Overlapping
+        segments use the highest weight.
+        """
+        boundaries = sorted({0, WEEK_SECONDS, *(
+            offset for start, end, _ in segments for offset in (start, end)
+        )})
+
+        starts, weights = [], []
+        for start, end in zip(boundaries, boundaries[1:]):
+            weight = max(
+                (w for s, e, w in segments if s <= start and end <= e), default=0.0
+            )
+            # Merge neighbours with the same weight to keep the table small
+            if weights and weights[-1] == weight:
+                continue
+            starts.append(start)
+            weights.append(weight)
+
+        lengths = [end - start for start, end in zip(starts, [*starts[1:], WEEK_SECONDS])]
+        total = sum(weight * length for weight, length in zip(weights, lengths))
+        if total <= 0:
+            raise ValueError("Schedule has no consumption")
+
+        scale = WEEK_SECONDS / total
+        self._starts = starts
+        self._rates = [weight * scale for weight in weights]
+        self._cumulative = [0.0]
+        for rate, length in zip(self._rates, lengths[:-1]):
+            self._cumulative.append(self._cumulative[-1] + rate * length)
+        self._time_zone = time_zone
+        # Week -> (start, transition, wall offset before and after it, consumption jump)
+        self._weeks: dict[int, tuple] = {}
+        # Week -> sum of the jumps of the weeks before it, relative to the first week used
+        self._jump_totals: dict[int, float] = {}
+
+    def _table_consumed(self, offset: float) -> float:
+        """Return the consumption from Monday 00:00 until a wall-clock offset."""
+        index = bisect_right(self._starts, offset) - 1
+        return self._cumulative[index] + (offset - self._starts[index]) * self._rates[index]
+
+    def _table_offset(self, consumed: float) -> float:
+        """Return the first wall-clock offset at which the consumption reaches a value."""
+        index = bisect_left(self._cumulative, consumed)
+        if index < len(self._cumulative) and self._cumulative[index] == consumed:
+            return self._starts[index]
+        index -= 1
+        return self._starts[index] + (consumed - self._cumulative[index]) / self._rates[index]
+
+    def _local_midnight(self, day: date) -> datetime:
+        """Return the UTC instant of local midnight at the start of a day."""
+        return datetime.combine(day, time.min, tzinfo=self._time_zone).astimezone(timezone.utc)
+
+    def _week(self, week: int) -> tuple:
+        """Return the start and the DST transition of a schedule week."""
+        if (info := self._weeks.get(week)) is not None:
+            return info
+
+        start = self._local_midnight(_EPOCH_MONDAY + timedelta(weeks=week))
+        end = self._local_midnight(_EPOCH_MONDAY + timedelta(weeks=week + 1))
+        offset_start = start.astimezone(self._time_zone).utcoffset()
+        offset_end = end.astimezone(self._time_zone).utcoffset()
+        if offset_start == offset_end:
+            info = (start, None, 0.0, 0.0, 0.0)
+        else:
+            # First second of the week with the new UTC offset
+            low, high = 0, int((end - start).total_seconds())
+            while low < high:
+                middle = (low + high) // 2
+                when = start + timedelta(seconds=middle)
+                if when.astimezone(self._time_zone).utcoffset() == offset_end:
+                    high = middle
+                else:
+                    low = middle + 1
+            before = float(low)
+            after = min(max(before + (offset_end - offset_start).total_seconds(), 0.0), WEEK_SECONDS)
+            jump = self._table_consumed(after) - self._table_consumed(before)
+            info = (start, start + timedelta(seconds=low), before, after, jump)
+
+        self._weeks[week] = info
+        return info
+
+    def _jumps_before(self, week: int) -> float:
+        """Return the sum of the consumption jumps before a week."""
+        totals = self._jump_totals
+        if not totals:
+            totals[week] = 0.0
+        elif week not in totals:
+            low, high = min(totals), max(totals)
+            for later in range(high + 1, week + 1):
+                totals[later] = totals[later - 1] + self._week(later - 1)[4]
+            for earlier in range(low - 1, week - 1, -1):
+                totals[earlier] = totals[earlier + 1] - self._week(earlier)[4]
+        return totals[week]
+
+    def _week_consumed(self, week: int) -> float:
+        """Return the consumption until the start of a week."""
+        return week * WEEK_SECONDS - self._jumps_before(week)
+
+    def consumed_at(self, when: datetime) -> float:
+        """Return the effective seconds consumed from a reference point until a time."""
+        local = when.astimezone(self._time_zone)
+        week, weekday = divmod((local.date() - _EPOCH_MONDAY).days, 7)
+        offset = weekday * SECONDS_PER_DAY + (
+            local.hour * 3600 + local.minute * 60 + local.second + local.microsecond / 1e6
+        )
+
+        consumed = self._table_consumed(offset)
+        _, transition, _, _, jump = self._week(week)
+        if transition is not None and when >= transition:
+            consumed -= jump
+        return self._week_consumed(week) + consumed
+
+    def time_at(self, consumed: float) -> datetime:
+        """Return the first point in time at which the consumption reaches a value."""
+        week = int(consumed // WEEK_SECONDS)
+        # The jumps move the week boundaries by at most a few hours of consumption
+        while consumed < self._week_consumed(week):
+            week -= 1
+        while consumed >= self._week_consumed(week + 1):
+            week += 1
+        remainder = consumed - self._week_consumed(week)
+
+        start, transition, before, after, jump = self._week(week)
+        if transition is None or remainder <= self._table_consumed(before):
+            return start + timedelta(seconds=self._table_offset(remainder))
+        return transition + timedelta(seconds=self._table_offset(remainder + jump) - after)
+
+    def elapsed(self, start: datetime, end: datetime) -> float:
+        """Return the effective seconds consumed between two points in time."""
+        return self.consumed_at(end) - self.consumed_at(start)
+
+    def time_after(self, start: datetime, seconds: float) -> datetime:
+        """Return the point in time when the given effective seconds have passed after start."""
+        return self.time_at(self.consumed_at(start) + seconds)
+
+
+def schedule_from_config(data, time_zone: tzinfo) -> WeeklySchedule | None:
+    """Compile the schedule options of a config entry, None if no schedule is set."""
+    days = data.get(CONF_SCHEDULE_DAYS) or []
+    if not days:
+        return None
+
+    start = _seconds_of_day(data.get(CONF_SCHEDULE_START, DEFAULT_SCHEDULE_START))
+    end = _seconds_of_day(data.get(CONF_SCHEDULE_END, DEFAULT_SCHEDULE_END))
+    if end <= start:
+        # Overnight (or all day if start and end are equal)
+        end += SECONDS_PER_DAY
+    idle = data.get(CONF_SCHEDULE_IDLE, DEFAULT_SCHEDULE_IDLE) / 100
+
+    segments = [(0, WEEK_SECONDS, idle)]
+    for day in days:
+        day_start = WEEKDAYS.index(day) * SECONDS_PER_DAY
+        segment_start, segment_end = day_start + start, day_start + end
+        if segment_end > WEEK_SECONDS:
+            # Sunday night continues into Monday morning
+            segments.append((0, segment_end - WEEK_SECONDS, 1.0))
+            segment_end = WEEK_SECONDS
+        segments.append((segment_start, segment_end, 1.0))
+
+    return WeeklySchedule(segments, time_zone)
+
+
+def _seconds_of_day(value: str) -> int:
+    """Parse a HH:MM[:SS] time of day into seconds."""
+    parts = [int(part) for part in value.split(":")]
+    hours, minutes, seconds = (parts + [0, 0])[:3]
+    return hours * 3600 + minutes * 60 + seconds
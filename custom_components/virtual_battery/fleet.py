@@ -0,0 +1,36 @@
+"""Compact fleet snapshots for the Virtual Battery integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, FLEET_COLUMNS
+
+
+def fleet_row(entity) -> tuple:
+    """Build a compact row for a battery sensor, in FLEET_COLUMNS order."""
+    return (
+        entity.entity_id,
+        entity.native_value,
+        int(entity._calculate_empty_at().timestamp()),
+        entity._low_threshold,
+        entity._critical_threshold,
+    )
+
+
+def fleet_rows(hass: HomeAssistant) -> list[tuple]:
+    """Build rows for every battery sensor currently added to hass."""
+    return [
+        fleet_row(entity)
+        for entity in hass.data.get(DOMAIN, {}).get("entities", [])
+        if entity.entity_id is not None
+    ]
+
+
+def fleet_columns(rows: list[tuple]) -> dict[str, list[Any]]:
+    """Transpose rows into the columnar payload sent to clients."""
+    return {
+        column: [row[index] for row in rows]
+        for index, column in enumerate(FLEET_COLUMNS)
+    }
@@ -0,0 +1,116 @@
+"""Battery replacement history for the Virtual Battery integration."""
+from __future__ import annotations
+
+import logging
+import statistics
+from collections import deque
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    HISTORY_SAVE_DELAY,
+    HISTORY_SIZE,
+    HISTORY_STORAGE_KEY,
+    HISTORY_STORAGE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class ReplacementHistory:
+    """Bounded per-battery ring buffers of past resets, kept in integration storage.
+
+    Each record is a compact [reset_timestamp, level_at_reset, lifetime_days] list.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the replacement history."""
+        self._store = Store(hass, HISTORY_STORAGE_VERSION, HISTORY_STORAGE_KEY)
+        self._records: dict[str, deque] = {}
+
+    async def async_load(self) -> None:
+        """Load the history from storage."""
+        data = await self._store.async_load() or {}
+        for entry_id, records in data.get("entries", {}).items():
+            self._records[entry_id] = deque(records, maxlen=HISTORY_SIZE)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the data to store."""
+        return {
+            "entries": {
+                entry_id: list(records) for entry_id, records in self._records.items()
+            }
+        }
+
+    @callback
+    def async_add(self, entry_id: str, last_reset: datetime, level: float, reset_at: datetime) -> None:
+        """Record a battery replacement."""
+        lifetime = max(0.0, (reset_at - last_reset).total_seconds() / SECONDS_PER_DAY)
+        records = self._records.setdefault(entry_id, deque(maxlen=HISTORY_SIZE))
+        records.append([int(reset_at.timestamp()), round(level, 2), round(lifetime, 3)])
+        self._store.async_delay_save(self._data_to_save, HISTORY_SAVE_DELAY)
+
+    @callback
+    def async_remove(self, entry_id: str) -> None:
+        """Forget the history of a removed battery."""
+        if self._records.pop(entry_id, None) is not None:
+            self._store.async_delay_save(self._data_to_save, HISTORY_SAVE_DELAY)
+
+    def records(self, entry_id: str) -> list[dict]:
+        """Return the replacements of a battery, oldest first."""
+        return [
+            {
+                "reset_at": dt_util.utc_from_timestamp(timestamp).isoformat(),
+                "level": level,
+                "lifetime": lifetime,
+            }
+            for timestamp, level, lifetime in self._records.get(entry_id, ())
+        ]
+
+    def stats(self, entry_ids) -> dict:
+        """Return lifetime statistics over the replacements of the given batteries."""
+        records = [
+            record
+            for entry_id in entry_ids
+            for record in self._records.get(entry_id, ())
+        ]
+        return _lifetime_stats(records)
+
+
+def _lifetime_stats(records: list) -> dict:
+    """Calculate mean, p10, p90 and trend of the lifetimes in days.
+
+    The trend is the change of the lifetime in days per year of resets.
+    """
+    lifetimes = [lifetime for _, _, lifetime in records]
+    stats = {
+        "count": len(lifetimes),
+        "mean": None,
+        "p10": None,
+        "p90": None,
+        "trend": None,
+    }
+    if not lifetimes:
+        return stats
+
+    stats["mean"] = round(statistics.fmean(lifetimes), 2)
+    if len(lifetimes) == 1:
+        stats["p10"] = stats["p90"] = lifetimes[0]
+        return stats
+
+    deciles = statistics.quantiles(lifetimes, n=10, method="inclusive")
+    stats["p10"] = round(deciles[0], 2)
+    stats["p90"] = round(deciles[-1], 2)
+
+    reset_days = [timestamp / SECONDS_PER_DAY for timestamp, _, _ in records]
+    if len(set(reset_days)) > 1:
+        slope, _ = statistics.linear_regression(reset_days, lifetimes)
+        stats["trend"] = round(slope * 365, 2)
+
+    return stats
@@ -0,0 +1,168 @@
+"""Battery type inventory and purchase forecast for the Virtual Battery integration."""
+from __future__ import annotations
+
+import logging
+import math
+from datetime import datetime
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.util import dt as dt_util
+
+from .const import DEMAND_HORIZONS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def normalize_battery_type(battery_type: str | None) -> str | None:
+    """Return the canonical spelling of a free text battery type, e.g. "cr 2032" -> "CR2032"."""
+    if not battery_type:
+        return None
+    return "".join(battery_type.split()).replace("-", "").upper() or None
+
+
+def _contribution_demand(contribution, reference: datetime) -> tuple[int, ...]:
+    """Return the batteries one virtual battery needs within each horizon."""
+    _, quantity, empty_at, lifetime_days = contribution
+    days_until_empty = max(0.0, (empty_at - reference).total_seconds() / (24 * 60 * 60))
+    return tuple(
+        quantity * (math.floor((horizon - days_until_empty) / lifetime_days) + 1)
+        if days_until_empty <= horizon else 0
+        for horizon in DEMAND_HORIZONS
+    )
+
+
+class BatteryInventory:
+    """Per battery type counters of installed batteries and upcoming demand.
+
+    Each virtual battery contributes (type, quantity, empty_at, lifetime_days).
+    The counters are updated incrementally when a contribution changes, and
+    rebuilt from the stored contributions once a day when the horizons move.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the inventory."""
+        self._hass = hass
+        self._reference = dt_util.start_of_local_day()
+        self._contributions: dict[str, tuple] = {}
+        self._installed: dict[str, int] = {}
+        self._demand: dict[str, list[int]] = {}
+        self._sensors: dict[str, object] = {}
+        self._async_add_entities = None
+        self._sensor_factory = None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start the daily rollover, returns a callback to stop it."""
+        return async_track_time_change(
+            self._hass, self._async_rollover, hour=0, minute=0, second=0
+        )
+
+    @callback
+    def async_set_sensor_platform(self, async_add_entities, sensor_factory) -> None:
+        """Register the platform callback used to add a sensor per battery type."""
+        self._async_add_entities = async_add_entities
+        self._sensor_factory = sensor_factory
+        for battery_type in self._installed:
+            self._async_add_sensor(battery_type)
+
+    @callback
+    def async_update(self, entry_id: str, battery_type: str | None, quantity: int,
+                     empty_at: datetime, lifetime_days: float) -> None:
+        """Update the contribution of a virtual battery."""
+        contribution = None
+        battery_type = normalize_battery_type(battery_type)
+        if battery_type:
+            contribution = (battery_type, quantity, empty_at.replace(microsecond=0), lifetime_days)
+        if self._contributions.get(entry_id) == contribution:
+            return
+
+        changed = set()
+        old = self._contributions.pop(entry_id, None)
+        if old is not None:
+            self._apply(old, -1)
+            changed.add(old[0])
+        if contribution is not None:
+            self._contributions[entry_id] = contribution
+            self._apply(contribution, 1)
+            changed.add(battery_type)
+
+        for changed_type in changed:
+            self._async_type_changed(changed_type)
+
+    @callback
+    def async_remove(self, entry_id: str) -> None:
+        """Remove the contribution of a virtual battery."""
+        old = self._contributions.pop(entry_id, None)
+        if old is not None:
+            self._apply(old, -1)
+            self._async_type_changed(old[0])
+
+    def _apply(self, contribution, sign: int) -> None:
+        """Add or subtract a contribution from the counters."""
+        battery_type, quantity = contribution[0], contribution[1]
+        self._installed[battery_type] = self._installed.get(battery_type, 0) + sign * quantity
+        demand = self._demand.setdefault(battery_type, [0] * len(DEMAND_HORIZONS))
+        for index, count in enumerate(_contribution_demand(contribution, self._reference)):
+            demand[index] += sign * count
+
+    @callback
+    def _async_type_changed(self, battery_type: str) -> None:
+        """Drop types without batteries and update or add the type sensor."""
+        if not self._installed.get(battery_type):
+            self._installed.pop(battery_type, None)
+            self._demand.pop(battery_type, None)
+
+        if battery_type in self._sensors:
+            self._async_write_sensor(self._sensors[battery_type])
+        elif battery_type in self._installed:
+            self._async_add_sensor(battery_type)
+
+    @callback
+    def _async_add_sensor(self, battery_type: str) -> None:
+        """Add the demand sensor of a battery type."""
+        if self._async_add_entities is None or battery_type in self._sensors:
+            return
+        sensor = self._sensor_factory(self, battery_type)
+        self._sensors[battery_type] = sensor
+        self._async_add_entities([sensor])
+
+    @callback
+    def _async_write_sensor(self, sensor) -> None:
+        """Write the state of a type sensor once it has been added."""
+        if sensor.hass is not None:
+            sensor.async_write_ha_state()
+
+    @callback
+    def _async_rollover(self, now=None) -> None:
+        """Move the horizons to the new day."""
+        self._reference = dt_util.start_of_local_day()
+        self._installed.clear()
+        self._demand.clear()
+        for contribution in self._contributions.values():
+            self._apply(contribution, 1)
+        for sensor in self._sensors.values():
+            self._async_write_sensor(sensor)
+        _LOGGER.debug("Rebuilt battery demand for %d batteries", len(self._contributions))
+
+    def installed(self, battery_type: str) -> int:
+        """Return the number of installed batteries of a type."""
+        return self._installed.get(battery_type, 0)
+
+    def demand(self, battery_type: str) -> dict[int, int]:
+        """Return the demand of a battery type per horizon in days."""
+        counts = self._demand.get(battery_type, [0] * len(DEMAND_HORIZONS))
+        return dict(zip(DEMAND_HORIZONS, counts))
+
+    def as_dict(self) -> dict:
+        """Return installed batteries and demand for all battery types."""
+        return {
+            battery_type: {
+                "installed": self._installed[battery_type],
+                **{
+                    f"demand_{horizon}d": count
+                    for horizon, count in self.demand(battery_type).items()
+                },
+            }
+            for battery_type in sorted(self._installed)
+        }
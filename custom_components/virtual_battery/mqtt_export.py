@@ -0,0 +1,344 @@
+"""Batched MQTT export of the fleet state for the Virtual Battery integration."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import ssl
+import struct
+import time
+import zlib
+
+from homeassistant.const import (
+    CONF_CLIENT_ID,
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_SCAN_INTERVAL,
+    CONF_SSL,
+    CONF_USERNAME,
+    CONF_VERIFY_SSL,
+    EVENT_HOMEASSISTANT_STOP,
+)
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.start import async_at_started
+from homeassistant.util.ssl import get_default_context, get_default_no_verify_context
+
+from .const import (
+    CONF_COMPRESSION,
+    CONF_EXPORT_MODE,
+    CONF_PER_AREA,
+    CONF_SNAPSHOT_INTERVAL,
+    CONF_TOPIC,
+    DEFAULT_MQTT_CLIENT_ID,
+    EXPORT_MODE_CHANGES,
+    MQTT_BACKOFF_MAX,
+    MQTT_BACKOFF_MIN,
+    MQTT_CONNECT_TIMEOUT,
+    MQTT_KEEPALIVE_MARGIN,
+    MQTT_NO_AREA,
+)
+from .fleet import fleet_columns, fleet_rows
+
+_LOGGER = logging.getLogger(__name__)
+
+# MQTT 3.1.1 control packet types
+_CONNECT = 0x10
+_CONNACK = 0x20
+_PUBLISH = 0x30
+_PINGREQ = 0xC0
+_PINGRESP = 0xD0
+_DISCONNECT = 0xE0
+
+
+class MqttError(Exception):
+    """Error raised when the broker refuses or breaks the connection."""
+
+
+def _encode_string(value: str) -> bytes:
+    """Encode a length-prefixed UTF-8 string."""
+    data = value.encode("utf-8")
+    return struct.pack("!H", len(data)) + data
+
+
+def _packet(packet_type: int, body: bytes = b"") -> bytes:
+    """Build a control packet with its variable length header."""
+    header = bytearray([packet_type])
+    length = len(body)
+    while True:
+        length, digit = divmod(length, 128)
+        header.append(digit | 0x80 if length else digit)
+        if not length:
+            return bytes(header) + body
+
+
+class MqttPublisher:
+    """Minimal MQTT 3.1.1 client that only publishes QoS 0 messages.
+
+    Keeping the client this small avoids a dependency on an MQTT library, and
+    the exporter only ever needs to connect, publish and ping. Publishing with
+    QoS 0 is never acknowledged, so the ping responses are what tells a live
+    connection from a half-open one.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        client_id: str,
+        username: str | None = None,
+        password: str | None = None,
+        keepalive: int = 60,
+        ssl_context: ssl.SSLContext | None = None,
+    ):
+        """Initialize the publisher."""
+        self._host = host
+        self._port = port
+        self._client_id = client_id
+        self._username = username
+        self._password = password
+        self._keepalive = keepalive
+        self._ssl_context = ssl_context
+        self._ping_sent: float | None = None
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def async_connect(self) -> None:
+        """Open the connection and wait for the broker to accept it."""
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port, ssl=self._ssl_context),
+            MQTT_CONNECT_TIMEOUT,
+        )
+        self._ping_sent = None
+
+        flags = 0x02  # Clean session
+        payload = _encode_string(self._client_id)
+        if self._username is not None:
+            flags |= 0x80
+            payload += _encode_string(self._username)
+            if self._password is not None:
+                flags |= 0x40
+                payload += _encode_string(self._password)
+        self._writer.write(_packet(
+            _CONNECT,
+            _encode_string("MQTT") + struct.pack("!BBH", 4, flags, self._keepalive) + payload,
+        ))
+        await self._writer.drain()
+
+        connack = await asyncio.wait_for(self._reader.readexactly(4), MQTT_CONNECT_TIMEOUT)
+        if connack[0] != _CONNACK or connack[3] != 0:
+            raise MqttError(f"Connection refused with return code {connack[3]}")
+
+    async def async_wait_closed(self) -> None:
+        """Read incoming packets until the broker closes the connection."""
+        try:
+            while True:
+                packet_type = (await self._reader.readexactly(1))[0]
+                length, multiplier = 0, 1
+                while True:
+                    digit = (await self._reader.readexactly(1))[0]
+                    length += (digit & 0x7F) * multiplier
+                    multiplier *= 128
+                    if not digit & 0x80:
+                        break
+                await self._reader.readexactly(length)
+                if packet_type & 0xF0 == _PINGRESP:
+                    self._ping_sent = None
+        except asyncio.IncompleteReadError:
+            return
+
+    async def async_publish(self, topic: str, payload: bytes, retain: bool = False) -> None:
+        """Publish a message with QoS 0."""
+        self._writer.write(_packet(_PUBLISH | int(retain), _encode_string(topic) + payload))
+        await self._async_drain()
+
+    async def async_ping(self) -> None:
+        """Ping the broker, raises if an earlier ping was not answered within keepalive."""
+        now = time.monotonic()
+        if self._ping_sent is None:
+            self._ping_sent = now
+        elif now - self._ping_sent > self._keepalive:
+            raise MqttError("No ping response from broker")
+        self._writer.write(_packet(_PINGREQ))
+        await self._async_drain()
+
+    async def _async_drain(self) -> None:
+        """Wait for the write buffer to flush, a stalled broker times out after keepalive."""
+        async with asyncio.timeout(self._keepalive or MQTT_CONNECT_TIMEOUT):
+            await self._writer.drain()
+
+    async def async_close(self, disconnect: bool = False) -> None:
+        """Close the connection, optionally telling the broker first."""
+        if self._writer is None:
+            return
+        writer, self._writer, self._reader = self._writer, None, None
+        try:
+            if disconnect:
+                writer.write(_packet(_DISCONNECT))
+                await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+
+class FleetExporter:
+    """Publish the fleet state to one retained topic per fleet or per area.
+
+    Every interval the exporter builds the fleet rows and publishes either a
+    full snapshot or only the rows that changed since the last message. Only
+    full snapshots are retained, so a new subscriber always starts from the
+    complete state. In changes mode a full snapshot is sent after every
+    (re)connect and every snapshot interval.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: dict):
+        """Initialize the exporter from the mqtt_export configuration."""
+        self._hass = hass
+        self._topic = config[CONF_TOPIC].rstrip("/")
+        self._per_area = config[CONF_PER_AREA]
+        self._changes_only = config[CONF_EXPORT_MODE] == EXPORT_MODE_CHANGES
+        self._compression = config[CONF_COMPRESSION]
+        self._interval = config[CONF_SCAN_INTERVAL].total_seconds()
+        self._snapshot_interval = config[CONF_SNAPSHOT_INTERVAL].total_seconds()
+        self._snapshot_due = 0.0
+        ssl_context = None
+        if config[CONF_SSL]:
+            ssl_context = (
+                get_default_context() if config[CONF_VERIFY_SSL]
+                else get_default_no_verify_context()
+            )
+        self._publisher = MqttPublisher(
+            config[CONF_HOST],
+            config[CONF_PORT],
+            config.get(CONF_CLIENT_ID, DEFAULT_MQTT_CLIENT_ID),
+            config.get(CONF_USERNAME),
+            config.get(CONF_PASSWORD),
+            min(65535, int(self._interval) + MQTT_KEEPALIVE_MARGIN),
+            ssl_context,
+        )
+        self._sent: dict[str, dict[str, tuple]] = {}
+        self._task: asyncio.Task | None = None
+        self._unsub_started: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Start exporting once Home Assistant has started."""
+
+        @callback
+        def _start(_hass: HomeAssistant) -> None:
+            self._task = self._hass.async_create_background_task(
+                self._async_run(), f"{__name__} fleet export"
+            )
+
+        self._unsub_started = async_at_started(self._hass, _start)
+        self._hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_stop)
+
+    async def _async_stop(self, _event: Event) -> None:
+        """Stop exporting and disconnect from the broker."""
+        if self._unsub_started is not None:
+            self._unsub_started()
+            self._unsub_started = None
+        if self._task is not None:
+            self._task.cancel()
+        await self._publisher.async_close(disconnect=True)
+
+    async def _async_run(self) -> None:
+        """Connect, publish every interval and reconnect with backoff."""
+        backoff = MQTT_BACKOFF_MIN
+        while True:
+            try:
+                await self._publisher.async_connect()
+                _LOGGER.debug("Connected to MQTT broker for fleet export")
+                backoff = MQTT_BACKOFF_MIN
+                self._sent.clear()
+                self._snapshot_due = 0.0
+
+                closed = asyncio.ensure_future(self._publisher.async_wait_closed())
+                try:
+                    while not closed.done():
+                        await self._async_export()
+                        await self._publisher.async_ping()
+                        await asyncio.wait({closed}, timeout=self._interval)
+                    closed.result()
+                    raise MqttError("Connection closed by broker")
+                finally:
+                    closed.cancel()
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, MqttError) as err:
+                _LOGGER.warning(
+                    "Fleet export to MQTT broker failed (%s), retrying in %d seconds",
+                    str(err) or type(err).__name__, backoff,
+                )
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Unexpected error in fleet export, retrying in %d seconds", backoff
+                )
+            await self._publisher.async_close()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MQTT_BACKOFF_MAX)
+
+    def _rows_by_topic(self) -> dict[str, list[tuple]]:
+        """Group the fleet rows by their topic."""
+        rows = fleet_rows(self._hass)
+        if not self._per_area:
+            return {self._topic: rows}
+
+        entity_registry = er.async_get(self._hass)
+        device_registry = dr.async_get(self._hass)
+        topics: dict[str, list[tuple]] = {}
+        for row in rows:
+            area_id = None
+            if entity_entry := entity_registry.async_get(row[0]):
+                area_id = entity_entry.area_id
+                if area_id is None and entity_entry.device_id:
+                    device = device_registry.async_get(entity_entry.device_id)
+                    area_id = device.area_id if device else None
+            topics.setdefault(f"{self._topic}/{area_id or MQTT_NO_AREA}", []).append(row)
+        return topics
+
+    async def _async_export(self) -> None:
+        """Publish the fleet state of every topic that changed."""
+        timestamp = int(time.time())
+        topics = self._rows_by_topic()
+
+        snapshot = not self._changes_only or time.monotonic() >= self._snapshot_due
+        if snapshot:
+            self._snapshot_due = time.monotonic() + self._snapshot_interval
+
+        # Topics whose batteries were all removed or moved away get a last, empty snapshot
+        vanished = self._sent.keys() - topics.keys()
+        for topic in vanished:
+            topics[topic] = []
+
+        for topic, rows in topics.items():
+            sent = self._sent.get(topic)
+            full = snapshot or sent is None or topic in vanished
+            current = {row[0]: row for row in rows}
+            removed = []
+            if not full:
+                removed = [entity_id for entity_id in sent if entity_id not in current]
+                rows = [row for row in rows if sent.get(row[0]) != row]
+                if not rows and not removed:
+                    continue
+
+            await self._publisher.async_publish(
+                topic,
+                self._encode({
+                    "timestamp": timestamp,
+                    "full": full,
+                    **fleet_columns(rows),
+                    "removed": removed,
+                }),
+                retain=full,
+            )
+
+            if topic in vanished:
+                del self._sent[topic]
+            else:
+                self._sent[topic] = current
+
+    def _encode(self, payload: dict) -> bytes:
+        """Serialize a payload, compressed with zlib if enabled."""
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return zlib.compress(data) if self._compression else data
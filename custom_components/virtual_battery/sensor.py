@@ -1,5 +1,6 @@
 """Sensor platform for the Virtual Battery integration."""
 import logging
+import math
 from datetime import datetime, timedelta
 
 from homeassistant.components.sensor import (
@@ -8,24 +9,57 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_NAME, PERCENTAGE
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    ATTR_UNIT_OF_MEASUREMENT,
+    CONF_NAME,
+    PERCENTAGE,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+    UnitOfTemperature,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.event import (
+    async_track_state_change_event,
+    async_track_time_interval,
+)
 from homeassistant.helpers.device_registry import DeviceEntryType
-from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import device_registry as dr, entity_registry as er
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.restore_state import RestoreEntity
-from homeassistant.util import dt as dt_util
+from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
+from homeassistant.util import dt as dt_util, slugify
+from homeassistant.util.unit_conversion import TemperatureConverter
 
+from . import is_lean_entry
 from .const import (
+    ATTR_AVERAGE_TEMPERATURE,
+    ATTR_BATTERY_QUANTITY,
+    ATTR_BATTERY_TYPE,
+    ATTR_CHEMISTRY,
+    ATTR_CONSUMED,
     ATTR_DISCHARGE_DAYS,
+    ATTR_INSTALLED,
     ATTR_LAST_RESET,
     ATTR_LAST_UPDATE,
     ATTR_TIME_SINCE_RESET,
+    ATTR_TEMPERATURE,
+    ATTR_TEMPERATURE_SAMPLED_AT,
+    ATTR_TEMPERATURE_SENSOR,
     ATTR_TIME_UNTIL_EMPTY,
+    CONF_BATTERY_QUANTITY,
+    CONF_BATTERY_TYPE,
+    CONF_CHEMISTRY,
+    CONF_CRITICAL_THRESHOLD,
     CONF_DISCHARGE_DAYS,
+    CONF_LOW_THRESHOLD,
     CONF_TARGET_DEVICE,
+    CONF_TEMPERATURE_SENSOR,
+    DEFAULT_BATTERY_QUANTITY,
+    DEFAULT_CHEMISTRY,
+    DEMAND_HORIZONS,
     DOMAIN,
     SCAN_INTERVAL,
     BATTERY_LEVEL_LOW,
@@ -33,8 +67,13 @@ from .const import (
     BATTERY_LEVEL_CHARGING,
     EVENT_BATTERY_LEVEL_LOW,
     EVENT_BATTERY_LEVEL_CRITICAL,
-    EVENT_BATTERY_LEVEL_FULL
+    EVENT_BATTERY_LEVEL_FULL,
+    SIGNAL_FLEET_REMOVED,
+    SIGNAL_FLEET_UPDATED,
+    TEMPERATURE_AVERAGE_WINDOW,
+    TEMPERATURE_CURVES,
 )
+from .discharge import MultiplierCurve, WeeklySchedule, schedule_from_config
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -72,6 +111,21 @@ def get_device_info(hass: HomeAssistant, entry_id: str, name: str, target_device
     )
 
 
+async def async_setup_platform(
+    hass: HomeAssistant,
+    config: ConfigType,
+    async_add_entities: AddEntitiesCallback,
+    discovery_info: DiscoveryInfoType | None = None,
+) -> None:
+    """Set up the battery demand sensors, one per battery type."""
+    if discovery_info is None:
+        return
+
+    hass.data[DOMAIN]["inventory"].async_set_sensor_platform(
+        async_add_entities, BatteryDemandSensor
+    )
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
@@ -83,11 +137,25 @@ async def async_setup_entry(
     # Get device info (either for existing device or new one)
     device_info = get_device_info(hass, entry.entry_id, name, target_device)
 
-    battery_sensor = VirtualBatterySensor(hass, entry.entry_id, name, discharge_days, device_info, target_device)
-    time_since_reset_sensor = TimeSinceResetSensor(battery_sensor, name, device_info)
-    time_until_empty_sensor = TimeUntilEmptySensor(battery_sensor, name, device_info)
+    battery_sensor = VirtualBatterySensor(
+        hass, entry.entry_id, name, discharge_days, device_info, target_device,
+        temperature_sensor=entry.data.get(CONF_TEMPERATURE_SENSOR),
+        chemistry=entry.data.get(CONF_CHEMISTRY, DEFAULT_CHEMISTRY),
+        low_threshold=entry.data.get(CONF_LOW_THRESHOLD, BATTERY_LEVEL_LOW),
+        critical_threshold=entry.data.get(CONF_CRITICAL_THRESHOLD, BATTERY_LEVEL_CRITICAL),
+        schedule=schedule_from_config(entry.data, dt_util.DEFAULT_TIME_ZONE),
+        battery_type=entry.data.get(CONF_BATTERY_TYPE),
+        battery_quantity=entry.data.get(CONF_BATTERY_QUANTITY, DEFAULT_BATTERY_QUANTITY),
+    )
+
+    # Lean entries skip the companion sensors, their values are in the battery attributes
+    if not is_lean_entry(hass, entry):
+        battery_sensor._companions = [
+            TimeSinceResetSensor(battery_sensor, name, device_info),
+            TimeUntilEmptySensor(battery_sensor, name, device_info),
+        ]
 
-    async_add_entities([battery_sensor, time_since_reset_sensor, time_until_empty_sensor])
+    async_add_entities([battery_sensor, *battery_sensor._companions])
 
     # Store sensor instance in hass.data for service access
     if DOMAIN not in hass.data:
@@ -95,6 +163,7 @@ async def async_setup_entry(
     if "entities" not in hass.data[DOMAIN]:
         hass.data[DOMAIN]["entities"] = []
     hass.data[DOMAIN]["entities"].append(battery_sensor)
+    hass.data[DOMAIN].setdefault("batteries", {})[entry.entry_id] = battery_sensor
 
 class VirtualBatterySensor(SensorEntity, RestoreEntity):
     """Implementation of a Virtual Battery sensor."""
@@ -102,25 +171,62 @@ class VirtualBatterySensor(SensorEntity, RestoreEntity):
     _attr_device_class = SensorDeviceClass.BATTERY
     _attr_native_unit_of_measurement = PERCENTAGE
     _attr_state_class = SensorStateClass.MEASUREMENT
-
-    def __init__(self, hass, entry_id, name, discharge_days, device_info: DeviceInfo, target_device_id: str | None = None):
+    _name_suffix = "Battery Level"
+
+    def __init__(
+        self,
+        hass,
+        entry_id,
+        name,
+        discharge_days,
+        device_info: DeviceInfo,
+        target_device_id: str | None = None,
+        temperature_sensor: str | None = None,
+        chemistry: str = DEFAULT_CHEMISTRY,
+        low_threshold: int = BATTERY_LEVEL_LOW,
+        critical_threshold: int = BATTERY_LEVEL_CRITICAL,
+        schedule: WeeklySchedule | None = None,
+        battery_type: str | None = None,
+        battery_quantity: int = DEFAULT_BATTERY_QUANTITY,
+    ):
         """Initialize the Virtual Battery sensor."""
         super().__init__()
         self._hass = hass
         self._entry_id = entry_id
-        self._attr_name = f"{name} Battery Level"
+        self._attr_name = f"{name} {self._name_suffix}"
         self._discharge_days = discharge_days
         self._attr_unique_id = f"{DOMAIN}_{entry_id}"
         self._target_device_id = target_device_id
+        self._companions = []
         
         self._battery_level = 100
         self._last_reset = dt_util.utcnow()
         self._last_update = dt_util.utcnow()
         
         # Threshold state tracking
+        self._low_threshold = low_threshold
+        self._critical_threshold = critical_threshold
         self._below_low_threshold = False
         self._below_critical_threshold = False
         self._at_full = True  # Start at full charge
+
+        # Physical batteries, counted in the battery type inventory
+        self._battery_type = battery_type
+        self._battery_quantity = battery_quantity
+
+        # Weekly consumption schedule, None for constant discharge
+        self._schedule = schedule
+
+        # Temperature compensation: consumed capacity is integrated at each
+        # temperature sample and extrapolated with the last sample in between
+        self._temperature_sensor = temperature_sensor
+        self._chemistry = chemistry
+        self._temperature_curve = MultiplierCurve(TEMPERATURE_CURVES[chemistry])
+        self._temperature = None
+        self._average_temperature = None
+        self._consumed = 0.0
+        self._sampled_at = self._last_reset
+        self._unsub_temperature = None
         
         # Calculate discharge rate
         self._calculate_discharge_rate()
@@ -144,6 +250,179 @@ class VirtualBatterySensor(SensorEntity, RestoreEntity):
             )
         )
 
+        self._async_track_temperature()
+        self.async_on_remove(self._async_untrack_temperature)
+
+    @callback
+    def _async_track_temperature(self):
+        """Start integrating samples of the linked temperature sensor."""
+        if not self._temperature_sensor:
+            return
+
+        self._unsub_temperature = async_track_state_change_event(
+            self._hass, [self._temperature_sensor], self._async_temperature_changed
+        )
+
+        # Seed with the current reading, this also covers the time we were stopped
+        temperature = self._parse_temperature(self._hass.states.get(self._temperature_sensor))
+        if temperature is not None:
+            self._add_temperature_sample(temperature, dt_util.utcnow())
+
+    @callback
+    def _async_untrack_temperature(self):
+        """Stop listening to the linked temperature sensor."""
+        if self._unsub_temperature is not None:
+            self._unsub_temperature()
+            self._unsub_temperature = None
+
+    @callback
+    def _async_temperature_changed(self, event):
+        """Handle a new sample from the linked temperature sensor."""
+        temperature = self._parse_temperature(event.data.get("new_state"))
+        if temperature is not None:
+            self._add_temperature_sample(temperature, dt_util.utcnow())
+
+    def _parse_temperature(self, state):
+        """Return the temperature of a state in °C, or None if not usable."""
+        if state is None or state.state in (STATE_UNKNOWN, STATE_UNAVAILABLE):
+            return None
+        try:
+            temperature = float(state.state)
+        except (ValueError, TypeError):
+            return None
+        if not math.isfinite(temperature):
+            return None
+
+        unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+        if unit and unit != UnitOfTemperature.CELSIUS:
+            try:
+                temperature = TemperatureConverter.convert(
+                    temperature, unit, UnitOfTemperature.CELSIUS
+                )
+            except HomeAssistantError:
+                _LOGGER.warning(
+                    "Unsupported temperature unit %s of %s", unit, self._temperature_sensor
+                )
+                return None
+        return temperature
+
+    def _temperature_multiplier(self, temperature):
+        """Return the discharge rate multiplier at a temperature."""
+        if temperature is None:
+            return 1.0
+        return self._temperature_curve(temperature)
+
+    def _discharge_seconds(self, start, end):
+        """Return the discharge time between two points in time, following the schedule."""
+        if self._schedule is None:
+            return (end - start).total_seconds()
+        return self._schedule.elapsed(start, end)
+
+    def _time_after(self, start, seconds):
+        """Return the point in time when the given discharge time has passed after start."""
+        if self._schedule is None:
+            return start + timedelta(seconds=seconds)
+        return self._schedule.time_after(start, seconds)
+
+    def _consumed_until(self, when):
+        """Return the consumed percentage at a time, holding the last sampled temperature."""
+        elapsed = max(0.0, self._discharge_seconds(self._sampled_at, when))
+        discharge_per_second = 100 / (self._discharge_days * 24 * 60 * 60)
+        consumed = self._consumed + (
+            discharge_per_second * self._temperature_multiplier(self._temperature) * elapsed
+        )
+        return min(100.0, self._validate_value(consumed, self._consumed))
+
+    def _add_temperature_sample(self, temperature, now):
+        """Integrate consumption up to a new temperature sample."""
+        elapsed = max(0.0, (now - self._sampled_at).total_seconds())
+        discharge_elapsed = max(0.0, self._discharge_seconds(self._sampled_at, now))
+
+        if self._temperature is None:
+            # First sample, everything before it was discharged at the nominal rate
+            consumed = self._consumed_until(now)
+            self._average_temperature = temperature
+        else:
+            # Trapezoidal rule between the previous and the new sample
+            multiplier = (
+                self._temperature_multiplier(self._temperature)
+                + self._temperature_multiplier(temperature)
+            ) / 2
+            discharge_per_second = 100 / (self._discharge_days * 24 * 60 * 60)
+            consumed = self._validate_value(
+                self._consumed + discharge_per_second * multiplier * discharge_elapsed, self._consumed
+            )
+
+            # Time-weighted exponential average for the empty forecast, the
+            # previous temperature is the one that was held during the interval
+            if self._average_temperature is None:
+                self._average_temperature = self._temperature
+            alpha = 1 - math.exp(-elapsed / TEMPERATURE_AVERAGE_WINDOW.total_seconds())
+            self._average_temperature += alpha * (self._temperature - self._average_temperature)
+
+        self._consumed = min(100.0, consumed)
+        self._temperature = temperature
+        self._sampled_at = now
+
+    def _restart_integration(self, consumed, now):
+        """Restart the temperature integration from a known consumed percentage."""
+        self._consumed = consumed
+        self._sampled_at = now
+
+    async def async_set_temperature_compensation(self, temperature_sensor, chemistry):
+        """Link a different temperature sensor or battery chemistry."""
+        if temperature_sensor == self._temperature_sensor and chemistry == self._chemistry:
+            return
+
+        # Keep the consumption so far, integrated with the old settings
+        now = dt_util.utcnow()
+        self._calculate_current_battery_level()
+        self._restart_integration(100 - self._battery_level, now)
+
+        self._async_untrack_temperature()
+        if temperature_sensor != self._temperature_sensor:
+            self._temperature = None
+            self._average_temperature = None
+        self._temperature_sensor = temperature_sensor
+        self._chemistry = chemistry
+        self._temperature_curve = MultiplierCurve(TEMPERATURE_CURVES[chemistry])
+        if self.hass is not None:
+            self._async_track_temperature()
+
+        if not self._temperature_sensor:
+            # Back to the nominal model, backdate last_reset to the current level
+            await self.async_set_battery_level(self._battery_level)
+            return
+
+        self._last_update = now
+        self.async_write_ha_state()
+        self._notify_sensors()
+
+    async def async_will_remove_from_hass(self):
+        """Run when entity will be removed from hass."""
+        await super().async_will_remove_from_hass()
+        async_dispatcher_send(self._hass, SIGNAL_FLEET_REMOVED, self.entity_id)
+        inventory = self._hass.data[DOMAIN].get("inventory")
+        if inventory is not None:
+            inventory.async_remove(self._entry_id)
+
+    @callback
+    def async_write_ha_state(self):
+        """Write the state to hass and notify fleet subscribers and the inventory."""
+        super().async_write_ha_state()
+        async_dispatcher_send(self._hass, SIGNAL_FLEET_UPDATED, self)
+
+        # Only changes the inventory counters if the projected empty time changed
+        inventory = self._hass.data[DOMAIN].get("inventory")
+        if inventory is not None:
+            inventory.async_update(
+                self._entry_id,
+                self._battery_type,
+                self._battery_quantity,
+                self._calculate_empty_at(),
+                self._discharge_days,
+            )
+
     async def _async_restore_state_from_last_stored(self):
         """Restore state using RestoreEntity."""
         last_state = await self.async_get_last_state()
@@ -187,6 +466,9 @@ class VirtualBatterySensor(SensorEntity, RestoreEntity):
                 else:
                     # If state isn't available, calculate based on time since last reset
                     self._calculate_current_battery_level()
+
+                if self._temperature_sensor:
+                    self._restore_temperature_state(attrs)
                 
                 _LOGGER.debug(
                     "Restored state for %s: level=%.2f, discharge_days=%d, last_reset=%s",
@@ -206,6 +488,25 @@ class VirtualBatterySensor(SensorEntity, RestoreEntity):
             self._calculate_discharge_rate()
             self._calculate_current_battery_level()
 
+    def _restore_temperature_state(self, attrs):
+        """Restore the temperature integration from state attributes."""
+        if (
+            ATTR_CONSUMED in attrs
+            and ATTR_TEMPERATURE_SAMPLED_AT in attrs
+            and attrs.get(ATTR_TEMPERATURE_SENSOR) == self._temperature_sensor
+        ):
+            sampled_at = datetime.fromisoformat(attrs[ATTR_TEMPERATURE_SAMPLED_AT])
+            if sampled_at.tzinfo is None:
+                sampled_at = sampled_at.replace(tzinfo=dt_util.UTC)
+            self._restart_integration(self._validate_value(attrs[ATTR_CONSUMED]), sampled_at)
+
+            if attrs.get(ATTR_CHEMISTRY) == self._chemistry:
+                self._temperature = attrs.get(ATTR_TEMPERATURE)
+                self._average_temperature = attrs.get(ATTR_AVERAGE_TEMPERATURE)
+        else:
+            # Sensor newly linked, continue from the restored level
+            self._restart_integration(100 - self._battery_level, self._last_update)
+
     def _calculate_discharge_rate(self):
         """Calculate the discharge rate based on discharge days."""
         # For X days: 100% / (X days * 24 hours * 60 minutes) * SCAN_INTERVAL_minutes
@@ -227,6 +528,13 @@ class VirtualBatterySensor(SensorEntity, RestoreEntity):
 
     def _calculate_current_battery_level(self):
         """Calculate the current battery level based on time since last reset."""
+        if self._temperature_sensor:
+            # The level was extrapolated with the previous temperature, if the
+            # integral ends up lower the reported level is held until it catches up
+            consumed = self._consumed_until(dt_util.utcnow())
+            self._battery_level = max(0, min(self._battery_level, 100 - consumed))
+            return
+
         if self._last_reset:
             current_time = dt_util.utcnow()
             time_since_reset = current_time - self._last_reset
@@ -237,7 +545,7 @@ class VirtualBatterySensor(SensorEntity, RestoreEntity):
                 self._last_reset = current_time
                 time_since_reset = timedelta(seconds=0)
                 
-            minutes_since_reset = time_since_reset.total_seconds() / 60
+            minutes_since_reset = self._discharge_seconds(self._last_reset, current_time) / 60
             
             # Calculate total discharge since last reset with validation
             total_discharge = self._validate_value(
@@ -266,24 +574,24 @@ class VirtualBatterySensor(SensorEntity, RestoreEntity):
         elif previous_level >= BATTERY_LEVEL_CHARGING and self._battery_level < BATTERY_LEVEL_CHARGING:
             self._at_full = False
 
-        # Low battery event (crossing 20% threshold)
-        if previous_level >= BATTERY_LEVEL_LOW and self._battery_level < BATTERY_LEVEL_LOW:
+        # Low battery event (crossing the low threshold, 20% by default)
+        if previous_level >= self._low_threshold and self._battery_level < self._low_threshold:
             self._below_low_threshold = True
             self._hass.bus.async_fire(
                 EVENT_BATTERY_LEVEL_LOW,
                 {"entity_id": self.entity_id, "battery_level": self._battery_level}
             )
-        elif previous_level < BATTERY_LEVEL_LOW and self._battery_level >= BATTERY_LEVEL_LOW:
+        elif previous_level < self._low_threshold and self._battery_level >= self._low_threshold:
             self._below_low_threshold = False
 
-        # Critical battery event (crossing 10% threshold)
-        if previous_level >= BATTERY_LEVEL_CRITICAL and self._battery_level < BATTERY_LEVEL_CRITICAL:
+        # Critical battery event (crossing the critical threshold, 10% by default)
+        if previous_level >= self._critical_threshold and self._battery_level < self._critical_threshold:
             self._below_critical_threshold = True
             self._hass.bus.async_fire(
                 EVENT_BATTERY_LEVEL_CRITICAL,
                 {"entity_id": self.entity_id, "battery_level": self._battery_level}
             )
-        elif previous_level < BATTERY_LEVEL_CRITICAL and self._battery_level >= BATTERY_LEVEL_CRITICAL:
+        elif previous_level < self._critical_threshold and self._battery_level >= self._critical_threshold:
             self._below_critical_threshold = False
 
     async def _async_update(self, now=None):
@@ -330,41 +638,57 @@ class VirtualBatterySensor(SensorEntity, RestoreEntity):
             ATTR_LAST_UPDATE: self._last_update.isoformat(),
             ATTR_TIME_SINCE_RESET: self._calculate_time_since_reset(),
             ATTR_TIME_UNTIL_EMPTY: self._calculate_time_until_empty(),
+            **self._temperature_attributes(),
+            **self._battery_type_attributes(),
+        }
+
+    def _battery_type_attributes(self):
+        """Return the battery type state attributes."""
+        if not self._battery_type:
+            return {}
+        return {
+            ATTR_BATTERY_TYPE: self._battery_type,
+            ATTR_BATTERY_QUANTITY: self._battery_quantity,
+        }
+
+    def _temperature_attributes(self):
+        """Return the temperature compensation state attributes."""
+        if not self._temperature_sensor:
+            return {}
+        return {
+            ATTR_TEMPERATURE_SENSOR: self._temperature_sensor,
+            ATTR_CHEMISTRY: self._chemistry,
+            ATTR_TEMPERATURE: self._temperature,
+            ATTR_AVERAGE_TEMPERATURE: (
+                round(self._average_temperature, 2)
+                if self._average_temperature is not None else None
+            ),
+            ATTR_CONSUMED: self._consumed,
+            ATTR_TEMPERATURE_SAMPLED_AT: self._sampled_at.isoformat(),
         }
 
     def _notify_sensors(self):
         """Notify associated time sensors to update their state."""
-        # Schedule state updates for the time sensors
-        # They will pick up the new values from their native_value properties
-        # which reference this battery sensor's calculation methods
-        if self.hass is not None:
-            self.hass.async_create_task(self._async_update_time_sensors())
-
-    async def _async_update_time_sensors(self):
-        """Update time sensors by triggering their state write."""
-        # The time sensors get their values from the battery sensor's methods,
-        # so we just need to trigger a state update on entities that belong to our device
-        entity_registry = self._hass.helpers.entity_registry.async_get(self._hass)
-        if entity_registry:
-            for entity_entry in entity_registry.entities.values():
-                if (entity_entry.unique_id and 
-                    entity_entry.unique_id.startswith(self._attr_unique_id) and
-                    entity_entry.unique_id != self._attr_unique_id):
-                    # This is a related sensor (time_since_reset or time_until_empty)
-                    entity = self._hass.states.get(entity_entry.entity_id)
-                    if entity:
-                        # Trigger state update by getting the entity and calling async_write_ha_state
-                        component = self._hass.data.get("sensor")
-                        if component:
-                            sensor_entity = component.get_entity(entity_entry.entity_id)
-                            if sensor_entity and hasattr(sensor_entity, 'async_write_ha_state'):
-                                sensor_entity.async_write_ha_state()
+        # The time sensors get their values from this battery sensor's
+        # calculation methods, so writing their state is enough
+        for sensor in self._companions:
+            if sensor.hass is not None:
+                sensor.async_write_ha_state()
 
     async def async_reset_battery(self):
         """Reset battery level to 100%."""
+        now = dt_util.utcnow()
+
+        # Record the replacement before the old values are overwritten
+        history = self._hass.data.get(DOMAIN, {}).get("history")
+        if history is not None:
+            self._calculate_current_battery_level()
+            history.async_add(self._entry_id, self._last_reset, self._battery_level, now)
+
         self._battery_level = 100
-        self._last_reset = dt_util.utcnow()
-        self._last_update = dt_util.utcnow()
+        self._last_reset = now
+        self._last_update = now
+        self._restart_integration(0.0, self._last_reset)
         self.async_write_ha_state()
         self._notify_sensors()
 
@@ -380,23 +704,90 @@ class VirtualBatterySensor(SensorEntity, RestoreEntity):
             # from a full charge, then set last_reset to that time in the past
             discharge_percentage = 100 - self._battery_level
             minutes_to_discharge = (discharge_percentage / 100) * (self._discharge_days * 24 * 60)
-            time_delta = timedelta(minutes=minutes_to_discharge)
-            self._last_reset = current_time - time_delta
+            self._last_reset = self._time_after(current_time, -minutes_to_discharge * 60)
         else:
             # If battery is at 100%, reset timestamp is now
             self._last_reset = current_time
             
+        self._restart_integration(100 - self._battery_level, current_time)
         self._last_update = current_time
         self.async_write_ha_state()
         self._notify_sensors()
 
     async def async_set_discharge_days(self, discharge_days):
         """Set discharge days to specific value."""
+        if self._temperature_sensor:
+            # Consumption so far was at the old discharge rate
+            now = dt_util.utcnow()
+            self._restart_integration(self._consumed_until(now), now)
         self._discharge_days = discharge_days
         self._calculate_discharge_rate()
         self._last_update = dt_util.utcnow()
         self.async_write_ha_state()
 
+    async def async_set_schedule(self, schedule):
+        """Set a different weekly consumption schedule, keeping the current level."""
+        self._calculate_current_battery_level()
+        self._schedule = schedule
+        # Rebase last_reset (or the temperature integration) on the new schedule
+        await self.async_set_battery_level(self._battery_level)
+
+    async def async_set_battery_type(self, battery_type, battery_quantity):
+        """Set the type and number of physical batteries."""
+        self._battery_type = battery_type
+        self._battery_quantity = battery_quantity
+        self.async_write_ha_state()
+
+    async def async_set_thresholds(self, low_threshold, critical_threshold):
+        """Set the low and critical battery thresholds."""
+        self._low_threshold = low_threshold
+        self._critical_threshold = critical_threshold
+
+        # Re-evaluate the threshold state without firing events for the current level
+        self._below_low_threshold = self._battery_level < low_threshold
+        self._below_critical_threshold = self._battery_level < critical_threshold
+        self.async_write_ha_state()
+
+    async def async_set_target_device(self, name, target_device_id):
+        """Move the battery and its companion entities to another device.
+
+        Without a target device the entities move back to a standalone device.
+        """
+        device_registry = dr.async_get(self._hass)
+        entity_registry = er.async_get(self._hass)
+
+        # Creates the standalone device, or links this entry to the existing target device
+        device_info = get_device_info(self._hass, self._entry_id, name, target_device_id)
+        device = device_registry.async_get_or_create(config_entry_id=self._entry_id, **device_info)
+
+        for entity_entry in er.async_entries_for_config_entry(entity_registry, self._entry_id):
+            entity_registry.async_update_entity(entity_entry.entity_id, device_id=device.id)
+
+        # Detach this entry from the previous device, a standalone device is removed with it
+        if self._target_device_id:
+            old_device = device_registry.async_get(self._target_device_id)
+        else:
+            old_device = device_registry.async_get_device(identifiers={(DOMAIN, self._entry_id)})
+        if old_device is not None and old_device.id != device.id:
+            device_registry.async_update_device(old_device.id, remove_config_entry_id=self._entry_id)
+
+        self._target_device_id = target_device_id
+        self._attr_device_info = device_info
+        for sensor in self._companions:
+            sensor.async_set_device_info(device_info)
+        button = self._hass.data[DOMAIN].get("buttons", {}).get(self._entry_id)
+        if button is not None:
+            button.async_set_device_info(device_info)
+        _LOGGER.debug("Moved %s to device %s", self.entity_id, device.id)
+
+    async def async_set_name(self, name):
+        """Rename the battery sensor and its companion sensors."""
+        self._attr_name = f"{name} {self._name_suffix}"
+        self.async_write_ha_state()
+        for sensor in self._companions:
+            sensor._attr_name = f"{name} {sensor._name_suffix}"
+        self._notify_sensors()
+
     def _calculate_time_since_reset(self):
         """Calculate the time since the last battery reset in days as a float."""
         current_time = dt_util.utcnow()
@@ -419,8 +810,28 @@ class VirtualBatterySensor(SensorEntity, RestoreEntity):
         total_discharge_days = self._discharge_days
         remaining_days = (remaining_percentage / 100) * total_discharge_days
 
+        if self._temperature_sensor:
+            # Forecast with the recent average instead of the latest sample
+            remaining_days /= self._temperature_multiplier(self._average_temperature)
+
+        if self._schedule is not None:
+            now = dt_util.utcnow()
+            empty_at = self._time_after(now, remaining_days * 24 * 60 * 60)
+            return (empty_at - now).total_seconds() / (24 * 60 * 60)
+
         return remaining_days
 
+    def _calculate_empty_at(self):
+        """Calculate the point in time at which the battery will be empty."""
+        if self._temperature_sensor:
+            # Anchored on the last temperature sample so the value stays stable between samples
+            remaining_days = (100 - self._consumed) / 100 * self._discharge_days
+            remaining_days /= self._temperature_multiplier(self._average_temperature)
+            return self._time_after(self._sampled_at, remaining_days * 24 * 60 * 60)
+
+        # Anchored on last_reset so the value stays stable between updates
+        return self._time_after(self._last_reset, self._discharge_days * 24 * 60 * 60)
+
 class TimeSinceResetSensor(SensorEntity):
     """Sensor for tracking time since last reset."""
 
@@ -428,14 +839,20 @@ class TimeSinceResetSensor(SensorEntity):
     _attr_native_unit_of_measurement = "d"
     _attr_device_class = SensorDeviceClass.DURATION
     _attr_icon = "mdi:clock-start"
+    _name_suffix = "Time Since Reset"
 
     def __init__(self, battery_sensor, name: str, device_info: DeviceInfo):
         """Initialize the Time Since Reset sensor."""
         self._battery_sensor = battery_sensor
-        self._attr_name = f"{name} Time Since Reset"
+        self._attr_name = f"{name} {self._name_suffix}"
         self._attr_unique_id = f"{battery_sensor.unique_id}_time_since_reset"
         self._attr_device_info = device_info
 
+    @callback
+    def async_set_device_info(self, device_info: DeviceInfo) -> None:
+        """Set the device info after the sensor was moved to another device."""
+        self._attr_device_info = device_info
+
     @property
     def native_value(self):
         return round(self._battery_sensor._calculate_time_since_reset(), 2)
@@ -453,14 +870,20 @@ class TimeUntilEmptySensor(SensorEntity):
     _attr_native_unit_of_measurement = "d"
     _attr_device_class = SensorDeviceClass.DURATION
     _attr_icon = "mdi:clock-end"
+    _name_suffix = "Time Until Empty"
 
     def __init__(self, battery_sensor, name: str, device_info: DeviceInfo):
         """Initialize the Time Until Empty sensor."""
         self._battery_sensor = battery_sensor
-        self._attr_name = f"{name} Time Until Empty"
+        self._attr_name = f"{name} {self._name_suffix}"
         self._attr_unique_id = f"{battery_sensor.unique_id}_time_until_empty"
         self._attr_device_info = device_info
 
+    @callback
+    def async_set_device_info(self, device_info: DeviceInfo) -> None:
+        """Set the device info after the sensor was moved to another device."""
+        self._attr_device_info = device_info
+
     @property
     def native_value(self):
         return round(self._battery_sensor._calculate_time_until_empty(), 2)
@@ -469,4 +892,34 @@ class TimeUntilEmptySensor(SensorEntity):
     def extra_state_attributes(self):
         return {
             "linked_battery_sensor": self._battery_sensor.entity_id
-        }
\ No newline at end of file
+        }
+
+class BatteryDemandSensor(SensorEntity):
+    """Sensor for the number of batteries of a type needed in the next 30 days."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = "batteries"
+    _attr_icon = "mdi:battery-sync"
+    _attr_should_poll = False
+
+    def __init__(self, inventory, battery_type: str):
+        """Initialize the Battery Demand sensor."""
+        self._inventory = inventory
+        self._battery_type = battery_type
+        self._attr_name = f"Virtual Battery Demand {battery_type}"
+        self._attr_unique_id = f"{DOMAIN}_demand_{slugify(battery_type)}"
+
+    @property
+    def native_value(self):
+        return self._inventory.demand(self._battery_type)[DEMAND_HORIZONS[0]]
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            ATTR_BATTERY_TYPE: self._battery_type,
+            ATTR_INSTALLED: self._inventory.installed(self._battery_type),
+            **{
+                f"demand_{horizon}d": count
+                for horizon, count in self._inventory.demand(self._battery_type).items()
+            },
+        }
@@ -0,0 +1,120 @@
+"""Websocket API for the Virtual Battery integration."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    FLEET_BATCH_DELAY,
+    SIGNAL_FLEET_REMOVED,
+    SIGNAL_FLEET_UPDATED,
+    WS_TYPE_FLEET,
+    WS_TYPE_FLEET_SUBSCRIBE,
+)
+from .fleet import fleet_columns, fleet_row, fleet_rows
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_register_websocket_api(hass: HomeAssistant) -> None:
+    """Register the websocket commands for the Virtual Battery integration."""
+    websocket_api.async_register_command(hass, websocket_fleet)
+    websocket_api.async_register_command(hass, websocket_subscribe_fleet)
+
+
+@websocket_api.websocket_command({vol.Required("type"): WS_TYPE_FLEET})
+@callback
+def websocket_fleet(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Return a columnar snapshot of all virtual batteries."""
+    connection.send_result(msg["id"], fleet_columns(fleet_rows(hass)))
+
+
+@websocket_api.websocket_command({vol.Required("type"): WS_TYPE_FLEET_SUBSCRIBE})
+@callback
+def websocket_subscribe_fleet(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Send a fleet snapshot, then push only changed rows in batches."""
+    msg_id = msg["id"]
+    sent: dict[str, tuple] = {}
+    pending: dict[str, Any] = {}
+    removed: set[str] = set()
+    unsub_flush: CALLBACK_TYPE | None = None
+
+    @callback
+    def _flush(_now=None) -> None:
+        """Send the rows that changed since the last message."""
+        nonlocal unsub_flush
+        unsub_flush = None
+
+        rows = []
+        for entity_id, entity in pending.items():
+            row = fleet_row(entity)
+            if sent.get(entity_id) != row:
+                sent[entity_id] = row
+                rows.append(row)
+        pending.clear()
+
+        gone = [entity_id for entity_id in removed if sent.pop(entity_id, None)]
+        removed.clear()
+
+        if rows or gone:
+            connection.send_message(
+                websocket_api.event_message(
+                    msg_id, {**fleet_columns(rows), "removed": gone}
+                )
+            )
+
+    @callback
+    def _schedule_flush() -> None:
+        """Collect changes for a short window so one message covers a tick."""
+        nonlocal unsub_flush
+        if unsub_flush is None:
+            unsub_flush = async_call_later(hass, FLEET_BATCH_DELAY, _flush)
+
+    @callback
+    def _battery_updated(entity) -> None:
+        """Mark a battery as changed."""
+        pending[entity.entity_id] = entity
+        removed.discard(entity.entity_id)
+        _schedule_flush()
+
+    @callback
+    def _battery_removed(entity_id: str) -> None:
+        """Mark a battery as removed."""
+        pending.pop(entity_id, None)
+        removed.add(entity_id)
+        _schedule_flush()
+
+    unsubs = [
+        async_dispatcher_connect(hass, SIGNAL_FLEET_UPDATED, _battery_updated),
+        async_dispatcher_connect(hass, SIGNAL_FLEET_REMOVED, _battery_removed),
+    ]
+
+    @callback
+    def _unsubscribe() -> None:
+        """Stop listening for battery changes."""
+        for unsub in unsubs:
+            unsub()
+        if unsub_flush is not None:
+            unsub_flush()
+
+    connection.subscriptions[msg_id] = _unsubscribe
+    connection.send_result(msg_id)
+
+    rows = fleet_rows(hass)
+    sent.update((row[0], row) for row in rows)
+    connection.send_message(
+        websocket_api.event_message(msg_id, {**fleet_columns(rows), "removed": []})
+    )
+    _LOGGER.debug("Fleet subscription %s started with %d batteries", msg_id, len(rows))
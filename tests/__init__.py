@@ -0,0 +1 @@
+"""Tests for the Virtual Battery integration."""
@@ -0,0 +1,63 @@
+"""Tests for the discharge model helpers."""
+from datetime import datetime, timedelta, timezone
+import random
+from zoneinfo import ZoneInfo
+
+from custom_components.virtual_battery.discharge import (
+    SECONDS_PER_DAY,
+    WEEK_SECONDS,
+    WeeklySchedule,
+    schedule_from_config,
+)
+
+BERLIN = ZoneInfo("Europe/Berlin")
+
+
+def _utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_all_day_schedule_counts_real_seconds_across_dst() -> None:
+    """An all-day schedule consumes exactly the real time, DST or not."""
+    schedule = WeeklySchedule([(0, WEEK_SECONDS, 1.0)], BERLIN)
+
+    # Spring forward on 2026-03-29, fall back on 2026-10-25
+    assert schedule.elapsed(_utc(2026, 3, 28, 12), _utc(2026, 3, 30, 12)) == 2 * SECONDS_PER_DAY
+    assert schedule.elapsed(_utc(2026, 10, 24, 12), _utc(2026, 10, 26, 12)) == 2 * SECONDS_PER_DAY
+
+
+def test_skipped_hour_is_not_charged_and_repeated_hour_twice() -> None:
+    """Only the wall-clock hours that actually happen are charged."""
+    schedule = schedule_from_config(
+        {"schedule_days": ["sun"], "schedule_start": "02:00", "schedule_end": "03:00",
+         "schedule_idle": 0},
+        BERLIN,
+    )
+
+    assert schedule.elapsed(_utc(2026, 3, 28), _utc(2026, 3, 30)) == 0
+    assert schedule.elapsed(_utc(2026, 10, 24), _utc(2026, 10, 26)) == 2 * WEEK_SECONDS
+    assert schedule.elapsed(_utc(2026, 10, 31), _utc(2026, 11, 2)) == WEEK_SECONDS
+
+
+def test_time_after_is_the_inverse_of_elapsed_around_transitions() -> None:
+    """time_after and elapsed agree, also when the interval spans a transition."""
+    schedule = schedule_from_config(
+        {"schedule_days": ["sat", "sun"], "schedule_start": "01:30", "schedule_end": "03:30",
+         "schedule_idle": 10},
+        BERLIN,
+    )
+    rng = random.Random(1)
+
+    for _ in range(2000):
+        start = _utc(2026, 3, 29) + timedelta(seconds=rng.uniform(-3, 3) * SECONDS_PER_DAY)
+        seconds = rng.uniform(0, 10 * SECONDS_PER_DAY)
+        assert abs(schedule.elapsed(start, schedule.time_after(start, seconds)) - seconds) < 1e-3
+
+    # The consumption never decreases through the transition
+    previous = None
+    when = _utc(2026, 3, 28, 22)
+    while when < _utc(2026, 3, 29, 4):
+        consumed = schedule.consumed_at(when)
+        assert previous is None or consumed >= previous
+        previous = consumed
+        when += timedelta(minutes=1)
@@ -0,0 +1,61 @@
+"""Tests for the battery type inventory and demand forecast."""
+from datetime import datetime, timedelta, timezone
+
+from custom_components.virtual_battery import inventory as inventory_module
+from custom_components.virtual_battery.inventory import (
+    BatteryInventory,
+    _contribution_demand,
+    normalize_battery_type,
+)
+
+DAY = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_normalize_battery_type() -> None:
+    """Free text types are counted under one spelling."""
+    assert normalize_battery_type(" cr 2032 ") == "CR2032"
+    assert normalize_battery_type("cr-2032") == "CR2032"
+    assert normalize_battery_type(" - ") is None
+    assert normalize_battery_type(None) is None
+
+
+def test_contribution_demand_counts_replacements_per_horizon() -> None:
+    """The first replacement is due when empty, later ones every lifetime."""
+    contribution = ("CR2032", 2, DAY + timedelta(days=10), 100)
+    assert _contribution_demand(contribution, DAY) == (2, 2, 8)
+
+    # Empty beyond the shortest horizon
+    contribution = ("AA", 1, DAY + timedelta(days=60), 365)
+    assert _contribution_demand(contribution, DAY) == (0, 1, 1)
+
+    # Already empty, the replacement is due right away
+    contribution = ("AA", 1, DAY - timedelta(days=5), 30)
+    assert _contribution_demand(contribution, DAY) == (2, 4, 13)
+
+
+def test_rollover_rebuilds_counters_for_the_new_day(monkeypatch) -> None:
+    """After the horizons move, the counters match a fresh rebuild."""
+    monkeypatch.setattr(inventory_module.dt_util, "start_of_local_day", lambda: DAY)
+    inventory = BatteryInventory(None)
+    inventory.async_update("door", "cr 2032", 1, DAY + timedelta(days=31), 365)
+    inventory.async_update("remote", "CR2032", 2, DAY + timedelta(days=200), 365)
+    inventory.async_update("lock", "AA", 4, DAY + timedelta(days=90, hours=12), 180)
+    assert inventory.demand("CR2032") == {30: 0, 90: 1, 365: 3}
+    assert inventory.demand("AA") == {30: 0, 90: 0, 365: 8}
+
+    next_day = DAY + timedelta(days=1)
+    monkeypatch.setattr(inventory_module.dt_util, "start_of_local_day", lambda: next_day)
+    inventory._async_rollover()
+    assert inventory.demand("CR2032") == {30: 1, 90: 1, 365: 3}
+    assert inventory.demand("AA") == {30: 0, 90: 4, 365: 8}
+
+    rebuilt = BatteryInventory(None)
+    rebuilt.async_update("lock", "AA", 4, DAY + timedelta(days=90, hours=12), 180)
+    rebuilt.async_update("remote", "CR2032", 2, DAY + timedelta(days=200), 365)
+    rebuilt.async_update("door", "CR2032", 1, DAY + timedelta(days=31), 365)
+    assert inventory.as_dict() == rebuilt.as_dict()
+
+    # Removing a battery after the rollover leaves no stale demand behind
+    inventory.async_remove("lock")
+    assert inventory.installed("AA") == 0
+    assert "AA" not in inventory.as_dict()
@@ -0,0 +1,279 @@
+"""Tests for the MQTT fleet export against a local broker stand-in."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+import json
+import socket
+import struct
+from types import SimpleNamespace
+import zlib
+
+import pytest
+
+from custom_components.virtual_battery import mqtt_export
+from custom_components.virtual_battery.const import DOMAIN
+from custom_components.virtual_battery.mqtt_export import (
+    FleetExporter,
+    MqttError,
+    MqttPublisher,
+)
+
+
+class StandInBroker:
+    """Minimal MQTT broker that records the packets it receives."""
+
+    def __init__(self, return_code: int = 0, answer_pings: bool = True) -> None:
+        self.return_code = return_code
+        self.answer_pings = answer_pings
+        self.connects: list[bytes] = []
+        self.publishes: list[tuple[int, str, bytes]] = []
+        self.pings = 0
+        self.writers: list[asyncio.StreamWriter] = []
+        self.published = asyncio.Event()
+
+    async def start(self, port: int = 0) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.drop_connections()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def drop_connections(self) -> None:
+        for writer in self.writers:
+            writer.close()
+        self.writers.clear()
+
+    async def _handle(self, reader, writer) -> None:
+        self.writers.append(writer)
+        try:
+            while True:
+                packet_type, body = await self._read_packet(reader)
+                if packet_type == 0x10:
+                    self.connects.append(body)
+                    writer.write(bytes([0x20, 2, 0, self.return_code]))
+                elif packet_type & 0xF0 == 0x30:
+                    (length,) = struct.unpack("!H", body[:2])
+                    topic = body[2:2 + length].decode()
+                    self.publishes.append((packet_type & 0x0F, topic, body[2 + length:]))
+                    self.published.set()
+                elif packet_type == 0xC0:
+                    self.pings += 1
+                    if self.answer_pings:
+                        writer.write(bytes([0xD0, 0]))
+                elif packet_type == 0xE0:
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        writer.close()
+
+    @staticmethod
+    async def _read_packet(reader) -> tuple[int, bytes]:
+        packet_type = (await reader.readexactly(1))[0]
+        length, multiplier = 0, 1
+        while True:
+            digit = (await reader.readexactly(1))[0]
+            length += (digit & 0x7F) * multiplier
+            multiplier *= 128
+            if not digit & 0x80:
+                break
+        return packet_type, await reader.readexactly(length)
+
+
+class FakeBattery:
+    """The parts of a battery sensor used to build fleet rows."""
+
+    def __init__(self, entity_id: str, level: float) -> None:
+        self.entity_id = entity_id
+        self.native_value = level
+        self._low_threshold = 20
+        self._critical_threshold = 10
+
+    def _calculate_empty_at(self) -> datetime:
+        return datetime(2027, 1, 1, tzinfo=timezone.utc)
+
+
+def _exporter(port: int, entities: list, **config) -> FleetExporter:
+    hass = SimpleNamespace(data={DOMAIN: {"entities": entities}})
+    return FleetExporter(hass, {
+        "host": "127.0.0.1",
+        "port": port,
+        "ssl": False,
+        "verify_ssl": True,
+        "topic": "virtual_battery/fleet",
+        "per_area": False,
+        "mode": "snapshot",
+        "compression": False,
+        "scan_interval": timedelta(seconds=0.05),
+        "snapshot_interval": timedelta(hours=1),
+        **config,
+    })
+
+
+def test_connect_publish_and_ping() -> None:
+    """The publisher frames CONNECT, retained PUBLISH and PINGREQ packets."""
+
+    async def run() -> None:
+        broker = StandInBroker()
+        await broker.start()
+        publisher = MqttPublisher("127.0.0.1", broker.port, "exporter", "user", "secret", 90)
+        await publisher.async_connect()
+        closed = asyncio.ensure_future(publisher.async_wait_closed())
+
+        # Longer than 127 bytes, so the remaining length takes two bytes
+        payload = b"x" * 300
+        await publisher.async_publish("virtual_battery/fleet", payload, retain=True)
+        await publisher.async_ping()
+        await broker.published.wait()
+        await asyncio.sleep(0.05)
+        await publisher.async_close(disconnect=True)
+        await closed
+        await broker.stop()
+
+        connect = broker.connects[0]
+        assert connect[:7] == b"\x00\x04MQTT\x04"
+        assert connect[7] == 0xC2  # Username, password and clean session
+        assert struct.unpack("!H", connect[8:10]) == (90,)
+        assert b"exporter" in connect and b"user" in connect and b"secret" in connect
+        assert broker.publishes == [(1, "virtual_battery/fleet", payload)]
+        assert broker.pings == 1
+        assert publisher._ping_sent is None
+
+    asyncio.run(run())
+
+
+def test_refused_connection() -> None:
+    """A CONNACK with a return code other than 0 is an error."""
+
+    async def run() -> None:
+        broker = StandInBroker(return_code=5)
+        await broker.start()
+        publisher = MqttPublisher("127.0.0.1", broker.port, "exporter")
+        with pytest.raises(MqttError):
+            await publisher.async_connect()
+        await publisher.async_close()
+        await broker.stop()
+
+    asyncio.run(run())
+
+
+def test_missing_ping_response() -> None:
+    """A ping that is not answered within keepalive breaks the connection."""
+
+    async def run() -> None:
+        broker = StandInBroker(answer_pings=False)
+        await broker.start()
+        publisher = MqttPublisher("127.0.0.1", broker.port, "exporter", keepalive=0)
+        await publisher.async_connect()
+        await publisher.async_ping()
+        await asyncio.sleep(0.01)
+        with pytest.raises(MqttError):
+            await publisher.async_ping()
+        await publisher.async_close()
+        await broker.stop()
+
+    asyncio.run(run())
+
+
+def test_changes_mode_sends_snapshot_then_changed_rows() -> None:
+    """Changes mode starts with a retained snapshot and then only sends differences."""
+
+    async def run() -> None:
+        broker = StandInBroker()
+        await broker.start()
+        door = FakeBattery("sensor.door_battery_level", 80.0)
+        remote = FakeBattery("sensor.remote_battery_level", 50.0)
+        entities = [door, remote]
+        exporter = _exporter(broker.port, entities, mode="changes", compression=True)
+        await exporter._publisher.async_connect()
+
+        await exporter._async_export()
+        await exporter._async_export()  # Nothing changed, nothing sent
+        door.native_value = 79.5
+        entities.remove(remote)
+        await exporter._async_export()
+        await asyncio.sleep(0.05)
+        await exporter._publisher.async_close(disconnect=True)
+        await broker.stop()
+
+        messages = [json.loads(zlib.decompress(payload)) for _, _, payload in broker.publishes]
+        assert len(messages) == 2
+        assert messages[0]["full"] is True
+        assert messages[0]["entity_id"] == ["sensor.door_battery_level", "sensor.remote_battery_level"]
+        assert messages[1]["full"] is False
+        assert messages[1]["entity_id"] == ["sensor.door_battery_level"]
+        assert messages[1]["level"] == [79.5]
+        assert messages[1]["removed"] == ["sensor.remote_battery_level"]
+        # Only the full snapshot replaces the retained message
+        assert [retain for retain, _, _ in broker.publishes] == [1, 0]
+
+    asyncio.run(run())
+
+
+def test_reconnects_with_backoff(monkeypatch) -> None:
+    """The exporter retries until the broker is up and resends a snapshot after a drop."""
+    monkeypatch.setattr(mqtt_export, "MQTT_BACKOFF_MIN", 0.02)
+    monkeypatch.setattr(mqtt_export, "MQTT_BACKOFF_MAX", 0.05)
+
+    async def run() -> None:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        exporter = _exporter(port, [FakeBattery("sensor.door_battery_level", 80.0)])
+        task = asyncio.ensure_future(exporter._async_run())
+
+        # Nothing is listening yet, the exporter keeps retrying
+        await asyncio.sleep(0.2)
+        broker = StandInBroker()
+        await broker.start(port)
+        await asyncio.wait_for(broker.published.wait(), 2)
+
+        # The broker drops the connection, the exporter reconnects
+        broker.published.clear()
+        broker.drop_connections()
+        await asyncio.wait_for(broker.published.wait(), 2)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await exporter._publisher.async_close()
+        await broker.stop()
+
+        assert len(broker.connects) == 2
+        assert all(json.loads(payload)["full"] for _, _, payload in broker.publishes)
+
+    asyncio.run(run())
+
+
+def test_unexpected_error_is_retried(monkeypatch) -> None:
+    """An error while building the rows does not end the export task."""
+    monkeypatch.setattr(mqtt_export, "MQTT_BACKOFF_MIN", 0.02)
+    calls = []
+
+    def flaky_rows(hass):
+        calls.append(None)
+        if len(calls) == 1:
+            raise KeyError("entities")
+        return []
+
+    monkeypatch.setattr(mqtt_export, "fleet_rows", flaky_rows)
+
+    async def run() -> None:
+        broker = StandInBroker()
+        await broker.start()
+        exporter = _exporter(broker.port, [])
+        task = asyncio.ensure_future(exporter._async_run())
+        await asyncio.wait_for(broker.published.wait(), 2)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await exporter._publisher.async_close()
+        await broker.stop()
+
+        assert len(broker.connects) == 2
+        assert json.loads(broker.publishes[0][2])["full"] is True
+
+    asyncio.run(run())